@@ -1,22 +1,119 @@
 """
-Flask Bridge Server for Portfolio Importer Widget
+Quart Bridge Server for Portfolio Importer Widget
 Connects Siyuan widget to Python portfolio scripts
 """
 
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-import subprocess
+from quart import Quart, jsonify, request, send_file
+from quart.json.provider import DefaultJSONProvider
+from quart_cors import cors
+import asyncio
+import errno
+import hashlib
+import logging
+import orjson
 import pandas as pd
 import shutil
 import os
+import sys
+import tempfile
+import traceback
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+try:
+    # Optional: multi-threaded CSV parsing for the CSV fallback path
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
 
 from configs import PORTFOLIO_SCRIPT, VISUALIZER_SCRIPT, OUTPUT_DIR, SIYUAN_ASSETS_DIR, UNIFIED_HISTORY, NEWS_HISTORY, \
-    CHART_HTML, PYTHON_PATH
+    CHART_HTML, PYTHON_PATH, UNIFIED_HISTORY_PARQUET, NEWS_HISTORY_PARQUET, SCRIPTS_DIR, RUN_IN_PROCESS, \
+    BRIDGE_WORKERS, NEWS_CONTEXT_PARQUET, RUN_BUSY_EXIT_CODE
+
+if RUN_IN_PROCESS:
+    # 脚本本身在 load_scripts 中按 worker 导入; 这里只取轻量的运行锁异常
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from run_lock import RunInProgress
+else:
+    class RunInProgress(RuntimeError):
+        """Child-process mode: raised when a script exits with RUN_BUSY_EXIT_CODE"""
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    使用 orjson 序列化响应 (支持 numpy 标量，NaN 输出为 null)
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
-app = Flask(__name__)
-CORS(app)  # Allow cross-origin requests from Siyuan widget
+logging.basicConfig(level=os.getenv('LOGLEVEL', 'INFO'))
+log = logging.getLogger('bridge')
+
+app = Quart(__name__)
+app.json = ORJSONProvider(app)
+app = cors(app)  # Allow cross-origin requests from Siyuan widget
+
+# 进程内模式下由 load_scripts 赋值
+portfolio_exposure = None
+risk_visualizer = None
+
+
+@app.before_serving
+async def load_scripts():
+    """
+    只在实际处理请求的 worker 中导入脚本 (hypercorn 主进程不导入 pandas/yfinance)
+    每个 worker 只付一次导入开销；写入由 OUTPUT_DIR/run.lock 保证同一时刻只有一个 worker 在跑
+    """
+    global portfolio_exposure, risk_visualizer
+    if RUN_IN_PROCESS:
+        import portfolio_exposure
+        import risk_visualizer
+
+
+# Child-process environment, built once: current environ with UTF-8 forced
+_CHILD_ENV = {**os.environ, 'PYTHONUTF8': '1', 'PYTHONIOENCODING': 'utf-8'}
+
+
+async def run_script(script, timeout, cwd=None):
+    """
+    Run a Python script in a child process without blocking the event loop.
+    Returns (returncode, stdout, stderr) with output decoded as UTF-8.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        PYTHON_PATH, str(script),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=_CHILD_ENV
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise TimeoutError(f"{script} timed out after {timeout} seconds")
+
+    return proc.returncode, stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+
+
+async def run_in_process(func, timeout):
+    """
+    Run a script's entry point in a worker thread.
+    On timeout the request fails, but the thread runs on until the script returns; it keeps
+    holding the run lock meanwhile, so overlapping /run-task or /generate-chart calls get a 409.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(func), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"{func.__module__}.{func.__name__} timed out after {timeout} seconds")
 
 
 # =========================
@@ -25,43 +122,45 @@ CORS(app)  # Allow cross-origin requests from Siyuan widget
 
 
 @app.route('/run-task', methods=['POST'])
-def run_task():
+async def run_task():
     try:
-        # Create a copy of the current environment and force UTF-8
-        env = os.environ.copy()
-        env["PYTHONUTF8"] = "1"
-        print(f"📡 Attempting to run: {PORTFOLIO_SCRIPT}")
+        log.info("📡 Attempting to run: %s", PORTFOLIO_SCRIPT)
 
         # Ensure the output directory exists first
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-        # Use sys.executable to ensure we use the same python interpreter
-        # We also set the 'cwd' (current working directory) to the script's folder
-        result = subprocess.run(
-            [PYTHON_PATH, PORTFOLIO_SCRIPT],
-            capture_output=True,
-            text=True,
-            timeout=300,
-            cwd=os.path.dirname(PORTFOLIO_SCRIPT),
-            env = env,  # <--- Add this
-            encoding = 'utf-8'  # <--- Add this to ensure output is read as UTF-8
-        )
-
-        if result.returncode != 0:
-            print(f"❌ Script Error Output: {result.stderr}")
-            return jsonify({
-                'status': 'error',
-                'message': f'Python Script Error: {result.stderr}'
-            }), 500
-
-        summary = get_portfolio_summary()
+        if RUN_IN_PROCESS:
+            await run_in_process(portfolio_exposure.run, timeout=300)
+        else:
+            # Use sys.executable to ensure we use the same python interpreter
+            # We also set the 'cwd' (current working directory) to the script's folder
+            returncode, stdout, stderr = await run_script(
+                PORTFOLIO_SCRIPT,
+                timeout=300,
+                cwd=os.path.dirname(PORTFOLIO_SCRIPT)
+            )
+
+            if returncode == RUN_BUSY_EXIT_CODE:
+                raise RunInProgress(stdout.strip())
+            if returncode != 0:
+                log.error("❌ Script Error Output: %s", stderr)
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Python Script Error: {stderr}'
+                }), 500
+
+        summary = await asyncio.to_thread(get_portfolio_summary)
         return jsonify({
             'status': 'success',
             'summary': summary
         })
 
+    except RunInProgress as e:
+        log.warning("⏳ %s", e)
+        return jsonify({'status': 'busy', 'message': str(e)}), 409
+
     except Exception as e:
-        print(f"❌ Server Exception: {str(e)}")
+        log.exception("❌ Server Exception: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -71,112 +170,165 @@ def run_task():
 # ROUTE 2: Get Latest News
 # =========================
 @app.route('/get-latest-news', methods=['GET'])
-def get_latest_news():
+async def get_latest_news():
     try:
-        print("Loading News")
+        log.debug("Loading News")
         if not NEWS_HISTORY.exists():
             return jsonify({'status': 'error', 'message': 'News history file not found'}), 404
 
-        # 1. Read with pipe delimiter
-        # Note: If your file is still comma-separated, change sep to ','
-        # or update your portfolio_exposure_unified.py to save with sep='|'
-        news_df = pd.read_csv(NEWS_HISTORY, sep='|')
+        # Files only change when run-task completes, so reuse the last encoded
+        # payload while neither file has been rewritten
+        cache_key = (file_mtime(NEWS_HISTORY), file_mtime(NEWS_HISTORY_PARQUET),
+                     file_mtime(UNIFIED_HISTORY), file_mtime(UNIFIED_HISTORY_PARQUET),
+                     file_mtime(NEWS_CONTEXT_PARQUET))
+        etag = make_etag(cache_key)
+        last_modified = datetime.fromtimestamp(max(m for m in cache_key if m) / 1e9, tz=timezone.utc)
+        cached = not_modified_response(etag, last_modified)
+        if cached:
+            return cached
+
+        if _NEWS_PAYLOAD_CACHE.get('key') != cache_key:
+            payload = await asyncio.to_thread(build_news_payload)
+            _NEWS_PAYLOAD_CACHE['body'] = encode_news_body(payload)
+            _NEWS_PAYLOAD_CACHE['key'] = cache_key
+
+        response = app.response_class(_NEWS_PAYLOAD_CACHE['body'], mimetype=app.json.mimetype)
+        return set_cache_headers(response, etag, last_modified)
 
-        # 2. IMPORTANT: Replace NaN with empty strings so JSON doesn't break
-        news_df = news_df.fillna('')
+    except Exception as e:
+        log.exception("❌ Failed to load news")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-        # Get latest date
-        latest_date = news_df['Date'].max()
-        latest_news = news_df[news_df['Date'] == latest_date]
-
-        symbol_info = {}
-        if UNIFIED_HISTORY.exists():
-            print("Get Latest News Snapshot Date")
-            # Apply same logic to unified history
-            history_df = pd.read_csv(UNIFIED_HISTORY).fillna('')
-            latest_portfolio = history_df[history_df['Date'] == latest_date]
-            for ticker in latest_portfolio['Symbol'].unique():
-                ticker_data = latest_portfolio[latest_portfolio['Symbol'] == ticker].iloc[0]
-                symbol_info[ticker] = {
-                    'sector': ticker_data.get('Sector', ''),
-                    'earnings_date': ticker_data.get('EarningsDate', '')
-                }
-
-        print("Prepare News List")
-        news_list = []
-        for _, row in latest_news.iterrows():
-            ticker = row['ticker']
-            news_item = {
-                'ticker': ticker,
-                'symbol_info': symbol_info.get(ticker, {}),
-                'thesis': row.get('thesis', '')  # Include thesis block ID
-            }
-            # Fill 5 news slots
-            for i in range(1, 6):
-                news_item[f'news_{i}_title'] = row.get(f'news_{i}_title', '')
-                news_item[f'news_{i}_date'] = row.get(f'news_{i}_date', '')
-                news_item[f'news_{i}_link'] = row.get(f'news_{i}_link', '')
-            news_list.append(news_item)
-
-        if len(news_list) == 0:
-            print("There is no News")
-        return jsonify({
+
+def encode_news_body(payload):
+    """
+    将新闻 payload 编码为完整 JSON 字节串，只在缓存失效时编码一次 (普通响应，保留 Content-Length)
+    """
+    chunks = [b'{"status":"success","date":' + orjson.dumps(payload['date']) + b',"news":[']
+    for i, record in enumerate(payload['news']):
+        chunks.append((b',' if i else b'') + orjson.dumps(record, option=ORJSON_OPTIONS))
+    chunks.append(b']}')
+    return b''.join(chunks)
+
+
+# Ticker, thesis block ID and 5 news slots
+NEWS_COLUMNS = ['ticker', 'thesis'] + [f'news_{i}_{k}' for i in range(1, 6) for k in ('title', 'date', 'link')]
+
+
+def read_news_context():
+    """
+    读取 portfolio_exposure 写出的最新新闻宽表 (已合并 sector / earnings_date)
+    文件不存在、为空或早于任一 CSV (被手动修改过) 时返回 None，走双文件路径
+    """
+    context_mtime = file_mtime(NEWS_CONTEXT_PARQUET)
+    if context_mtime is None:
+        return None
+    if any(m is not None and m > context_mtime for m in (file_mtime(NEWS_HISTORY), file_mtime(UNIFIED_HISTORY))):
+        return None
+
+    context = pd.read_parquet(NEWS_CONTEXT_PARQUET, engine='pyarrow')
+    if context.empty:
+        return None
+    return context.astype({'earnings_date': 'string'}).fillna('')
+
+
+def build_news_payload():
+    """
+    读取新闻与 unified history，构建最新日期的新闻列表
+    """
+    context = read_news_context()
+    if context is not None:
+        # Single-file path: one read, two projections
+        records = context.reindex(columns=NEWS_COLUMNS, fill_value='').to_dict(orient='records')
+        infos = context[['sector', 'earnings_date']].to_dict(orient='records')
+        news_list = [{**r, 'symbol_info': info if matched else {}}
+                     for r, info, matched in zip(records, infos, context['in_portfolio'])]
+        return {
             'status': 'success',
-            'date': str(latest_date),
+            'date': str(context['Date'].iat[0]),
             'news': news_list
-        })
+        }
 
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+    # 1. Read the parquet copy, or the CSV with pipe delimiter
+    # Note: If your file is still comma-separated, change sep to ','
+    # or update your portfolio_exposure_unified.py to save with sep='|'
+    # 2. IMPORTANT: Replace NaN with empty strings so JSON doesn't break
+    news_df = cached_read_history(NEWS_HISTORY_PARQUET, NEWS_HISTORY, sep='|')
+
+    # Get latest date
+    latest_date, latest_news = latest_snapshot(news_df)
+
+    symbol_info = {}
+    if UNIFIED_HISTORY.exists():
+        log.debug("Get Latest News Snapshot Date")
+        # Apply same logic to unified history (first row per symbol)
+        history_df = cached_read_history(UNIFIED_HISTORY_PARQUET, UNIFIED_HISTORY,
+                                         columns=['Date', 'Symbol', 'Sector', 'EarningsDate'],
+                                         dtype={'Symbol': 'category', 'Sector': 'category',
+                                                'EarningsDate': 'string'})
+        latest_portfolio = snapshot_on(history_df, latest_date)
+        symbol_info = (
+            latest_portfolio.drop_duplicates('Symbol')
+            .set_index('Symbol')[['Sector', 'EarningsDate']]
+            .rename(columns={'Sector': 'sector', 'EarningsDate': 'earnings_date'})
+            .to_dict('index')
+        )
+
+    log.debug("Prepare News List")
+    # Missing slots (fewer than 5 articles, no thesis) become empty strings
+    records = latest_news.reindex(columns=NEWS_COLUMNS, fill_value='').to_dict(orient='records')
+    news_list = [{**r, 'symbol_info': symbol_info.get(r['ticker'], {})} for r in records]
+
+    if len(news_list) == 0:
+        log.info("There is no News")
+    return {
+        'status': 'success',
+        'date': str(latest_date),
+        'news': news_list
+    }
 
 
 # =========================
 # ROUTE 3: Generate Chart
 # =========================
-import traceback  # Add this at the top
-
-
 @app.route('/generate-chart', methods=['POST'])
-def generate_chart():
+async def generate_chart():
     try:
-        print(f"📊 Running visualizer: {VISUALIZER_SCRIPT}")
-
-        # Ensure the environment is UTF-8
-        env = os.environ.copy()
-        env["PYTHONUTF8"] = "1"
+        log.info("📊 Running visualizer: %s", VISUALIZER_SCRIPT)
 
         # Check if input file exists
         if not UNIFIED_HISTORY.exists():
             return jsonify({'status': 'error', 'message': f'Input CSV not found: {UNIFIED_HISTORY}'}), 404
 
-        result = subprocess.run(
-            [PYTHON_PATH, VISUALIZER_SCRIPT],
-            capture_output=True,
-            text=True,
-            timeout=60,
-            env=env,
-            encoding='utf-8'
-        )
-
-        # If the script printed anything to stderr, we want to see it
-        if result.returncode != 0:
-            print(f"❌ Visualizer Stderr: {result.stderr}")
-            print(f"❌ Visualizer Stdout: {result.stdout}")
-            return jsonify({
-                'status': 'error',
-                'message': 'Visualizer Script Error',
-                'details': result.stderr
-            }), 500
+        if RUN_IN_PROCESS:
+            await run_in_process(risk_visualizer.run, timeout=60)
+        else:
+            returncode, stdout, stderr = await run_script(VISUALIZER_SCRIPT, timeout=60)
+
+            if returncode == RUN_BUSY_EXIT_CODE:
+                raise RunInProgress(stdout.strip())
+            # If the script printed anything to stderr, we want to see it
+            if returncode != 0:
+                log.error("❌ Visualizer Stderr: %s", stderr)
+                log.error("❌ Visualizer Stdout: %s", stdout)
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Visualizer Script Error',
+                    'details': stderr
+                }), 500
 
         return jsonify({
             'status': 'success',
             'chart_path': str(CHART_HTML)
         })
 
+    except RunInProgress as e:
+        log.warning("⏳ %s", e)
+        return jsonify({'status': 'busy', 'message': str(e)}), 409
+
     except Exception as e:
-        # This prints the red error text in your Python terminal
-        traceback.print_exc()
+        # Full traceback in the server log
+        log.exception("❌ Chart generation failed")
         return jsonify({
             'status': 'error',
             'message': str(e),
@@ -187,12 +339,26 @@ def generate_chart():
 # ROUTE 4: Copy Chart to Siyuan Assets
 # =========================
 @app.route('/copy-chart-to-siyuan', methods=['POST'])
-def copy_chart_to_siyuan():
+async def copy_chart_to_siyuan():
     """
     将生成的图表复制到思源 assets 目录
     """
     try:
-        data = request.get_json()
+        data = await request.get_json()
+
+        # link 模式：不复制，直接嵌入 bridge 提供的 /chart.html
+        if data.get('mode') == 'link':
+            if not CHART_HTML.exists():
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Chart file not found'
+                }), 404
+            return jsonify({
+                'status': 'success',
+                'message': 'Chart served by bridge',
+                'asset_path': request.host_url.rstrip('/') + '/chart.html'
+            })
+
         chart_path = Path(data.get('chart_path'))
         
         if not chart_path.exists():
@@ -204,15 +370,15 @@ def copy_chart_to_siyuan():
         # Create assets directory if it doesn't exist
         SIYUAN_ASSETS_DIR.mkdir(parents=True, exist_ok=True)
         
-        # Generate unique filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        asset_filename = f'portfolio_chart_{timestamp}.html'
+        # One snapshot per day; later calls on the same day replace it
+        snapshot_date = datetime.now().strftime('%Y%m%d')
+        asset_filename = f'portfolio_chart_{snapshot_date}.html'
         asset_path = SIYUAN_ASSETS_DIR / asset_filename
         
-        # Copy file
-        shutil.copy2(chart_path, asset_path)
+        # Link or copy file atomically (off the event loop)
+        await asyncio.to_thread(link_or_copy, chart_path, asset_path)
         
-        print(f"✅ Chart copied to: {asset_path}")
+        log.info("✅ Chart copied to: %s", asset_path)
         
         # Return relative path for use in Siyuan
         relative_path = f'assets/{asset_filename}'
@@ -231,6 +397,191 @@ def copy_chart_to_siyuan():
         }), 500
 
 
+# =========================
+# ROUTE 5: Serve Chart
+# =========================
+@app.route('/chart.html', methods=['GET'])
+async def serve_chart():
+    """
+    直接提供最新图表（支持 ETag / Range / 304），无需复制到 assets
+    """
+    if not CHART_HTML.exists():
+        return jsonify({'status': 'error', 'message': 'Chart file not found'}), 404
+
+    response = await send_file(CHART_HTML, mimetype='text/html', conditional=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# =========================
+# HELPER: Cached History Reads
+# =========================
+# (csv path, columns, dtype, sep) -> ((parquet mtime, csv mtime), DataFrame). Cached frames are shared; treat as read-only.
+_HISTORY_CACHE = {}
+_SUMMARY_CACHE = {}
+_NEWS_PAYLOAD_CACHE = {}
+
+
+def file_mtime(path):
+    """
+    返回文件的 mtime (ns)，文件不存在时返回 None
+    """
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def read_csv_fast(path, columns=None, dtype=None, sep=','):
+    """
+    安装了 polars 时使用其多线程解析 CSV，否则使用 pandas
+    """
+    if HAS_POLARS:
+        # Scan the whole file for the schema: news slots can be empty for many rows
+        df = pl.read_csv(path, separator=sep, columns=columns, infer_schema_length=None).to_pandas()
+        return df.astype(dtype) if dtype else df
+    return pd.read_csv(path, sep=sep, usecols=columns, dtype=dtype)
+
+
+def parquet_is_fresh(parquet_path, csv_path):
+    """
+    parquet 存在且不早于 CSV 时才可用；CSV 更新过 (手动修改、只写了 CSV) 则读 CSV
+    """
+    parquet_mtime = file_mtime(parquet_path)
+    if parquet_mtime is None:
+        return False
+    csv_mtime = file_mtime(csv_path)
+    return csv_mtime is None or parquet_mtime >= csv_mtime
+
+
+def read_history(parquet_path, csv_path, columns=None, dtype=None, sep=','):
+    """
+    parquet 文件不早于 CSV 时读取 parquet (只读取需要的列)，否则回退到 CSV
+    dtype 可将重复字符串列 (Symbol, Sector) 读为 category
+    """
+    if parquet_is_fresh(parquet_path, csv_path):
+        df = pd.read_parquet(parquet_path, engine='pyarrow', columns=columns)
+        return df.astype(dtype) if dtype else df
+    return read_csv_fast(csv_path, columns=columns, dtype=dtype, sep=sep)
+
+
+def make_etag(key):
+    """
+    由文件状态 (mtime / 是否存在) 生成 ETag
+    """
+    return hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+
+
+def not_modified_response(etag, last_modified=None):
+    """
+    客户端缓存仍有效时返回 304 响应，否则返回 None
+    If-None-Match 优先于 If-Modified-Since
+    """
+    if request.if_none_match:
+        fresh = etag in request.if_none_match
+    else:
+        fresh = (last_modified is not None and request.if_modified_since is not None
+                 and last_modified.replace(microsecond=0) <= request.if_modified_since)
+    if not fresh:
+        return None
+
+    response = app.response_class('', status=304)
+    response.set_etag(etag)
+    return response
+
+
+def set_cache_headers(response, etag, last_modified=None):
+    """
+    附加 ETag / Last-Modified，并要求客户端每次重新验证
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def latest_snapshot(df):
+    """
+    返回 (最新日期, 最新日期的所有行)
+    历史文件按 Date 升序写入，此时最新日期位于末尾，二分查找即可定位
+    """
+    dates = df['Date']
+    if len(dates) and dates.is_monotonic_increasing:
+        latest_date = dates.iat[-1]
+        return latest_date, df.iloc[dates.searchsorted(latest_date, side='left'):]
+
+    latest_date = dates.max()
+    return latest_date, df[dates == latest_date]
+
+
+def snapshot_on(df, date):
+    """
+    返回指定日期的所有行；Date 有序时二分查找切片，避免整列布尔掩码
+    """
+    dates = df['Date']
+    if dates.is_monotonic_increasing:
+        return df.iloc[dates.searchsorted(date, side='left'):dates.searchsorted(date, side='right')]
+    return df[dates == date]
+
+
+def cached_read_history(parquet_path, csv_path, columns=None, dtype=None, sep=','):
+    """
+    读取历史文件并按 mtime 缓存，文件未变化时直接返回缓存的 DataFrame (NaN 已替换为空字符串)
+    """
+    # 两个文件任一变化都会使缓存失效 (决定读哪个文件的也是这两个 mtime)
+    mtime = (file_mtime(parquet_path), file_mtime(csv_path))
+    if mtime == (None, None):
+        raise FileNotFoundError(csv_path)
+    key = (csv_path, tuple(columns or ()), tuple(sorted((dtype or {}).items())), sep)
+    hit = _HISTORY_CACHE.get(key)
+    if hit and hit[0] == mtime:
+        return hit[1]
+
+    df = read_history(parquet_path, csv_path, columns=columns, dtype=dtype, sep=sep)
+    # Categorical columns only accept '' as a fill value once it is a category
+    for col in df.select_dtypes('category'):
+        if '' not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([''])
+    df = df.fillna('')
+    _HISTORY_CACHE[key] = (mtime, df)
+    return df
+
+
+# =========================
+# HELPER: Link or Copy Chart
+# =========================
+# 跨设备、权限不足或文件系统不支持硬链接 (FAT / 部分网络盘) 时回退为复制
+LINK_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP, errno.EINVAL}
+
+
+def link_or_copy(src, dst):
+    """
+    同一文件系统时创建硬链接 (不复制数据)，否则由内核完成复制 (sendfile / CopyFile2)
+    先写入临时文件再原子替换，避免思源读到半个文件
+    """
+    # 每次调用使用唯一的临时文件名：多个 worker / 同日多次调用不会共用 (或截断) 同一个 .tmp
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=f'.{dst.stem}.', suffix='.tmp')
+    os.close(fd)
+    os.unlink(tmp)
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError as e:
+            # 仅在文件系统不支持硬链接时改为复制，其他错误照常抛出
+            if e.errno not in LINK_UNSUPPORTED_ERRNOS:
+                raise
+            shutil.copyfile(src, tmp)
+            shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        # 失败时清理；dst 已是同一 inode 的硬链接时 rename 不做任何事，tmp 也会留下
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+
+
 # =========================
 # HELPER: Get Portfolio Summary
 # =========================
@@ -241,12 +592,17 @@ def get_portfolio_summary():
     try:
         if not UNIFIED_HISTORY.exists():
             return None
-        
-        df = pd.read_csv(UNIFIED_HISTORY)
+
+        mtime = (file_mtime(UNIFIED_HISTORY), file_mtime(UNIFIED_HISTORY_PARQUET))
+        if _SUMMARY_CACHE.get('mtime') == mtime:
+            return _SUMMARY_CACHE['summary']
+
+        df = read_history(UNIFIED_HISTORY_PARQUET, UNIFIED_HISTORY,
+                          columns=['Date', 'Symbol', 'Value', 'UnrealizedPL', 'TotalDividends'],
+                          dtype={'Symbol': 'category'})
         
         # Get latest date
-        latest_date = df['Date'].max()
-        latest_data = df[df['Date'] == latest_date]
+        latest_date, latest_data = latest_snapshot(df)
         
         # Calculate summary
         total_value = latest_data['Value'].sum()
@@ -254,51 +610,73 @@ def get_portfolio_summary():
         total_dividends = latest_data['TotalDividends'].sum()
         position_count = latest_data['Symbol'].nunique()
         
-        return {
-            'date': latest_date,
-            'total_value': f'${total_value:,.2f}',
-            'unrealized_pl': f'${total_pl:,.2f}',
-            'total_dividends': f'${total_dividends:,.2f}',
-            'position_count': position_count
+        summary = {
+            'date': str(latest_date),
+            'total_value': float(total_value),
+            'unrealized_pl': float(total_pl),
+            'total_dividends': float(total_dividends),
+            'position_count': int(position_count)
         }
+        _SUMMARY_CACHE['mtime'] = mtime
+        _SUMMARY_CACHE['summary'] = summary
+        return summary
         
     except Exception as e:
-        print(f"Error getting summary: {e}")
+        log.error("Error getting summary: %s", e)
         return None
 
 
 # =========================
-# ROUTE 5: Health Check
+# ROUTE 6: Health Check
 # =========================
 @app.route('/health', methods=['GET'])
-def health_check():
+async def health_check():
     """
     健康检查端点
     """
-    return jsonify({
+    files = {
+        'unified_history': UNIFIED_HISTORY.exists(),
+        'news_history': NEWS_HISTORY.exists(),
+        'chart_html': CHART_HTML.exists()
+    }
+    # The payload only depends on which files exist
+    etag = make_etag(tuple(files.values()))
+    cached = not_modified_response(etag)
+    if cached:
+        return cached
+
+    response = jsonify({
         'status': 'ok',
         'message': 'Bridge server is running',
-        'files': {
-            'unified_history': UNIFIED_HISTORY.exists(),
-            'news_history': NEWS_HISTORY.exists(),
-            'chart_html': CHART_HTML.exists()
-        }
+        'files': files
     })
+    return set_cache_headers(response, etag)
 
 
 # =========================
 # MAIN
 # =========================
 if __name__ == '__main__':
-    print("="*70)
-    print("Portfolio Importer Bridge Server")
-    print("="*70)
-    print(f"Portfolio script: {PORTFOLIO_SCRIPT}")
-    print(f"Visualizer script: {VISUALIZER_SCRIPT}")
-    print(f"Output directory: {OUTPUT_DIR}")
-    print(f"Siyuan assets: {SIYUAN_ASSETS_DIR}")
-    print("="*70)
-    print("\n🚀 Starting server on http://127.0.0.1:5000")
-    print("📡 Listening for widget requests...\n")
-    
-    app.run(host='127.0.0.1', port=5000, debug=True)
+    log.info(
+        "Portfolio Importer Bridge Server\n"
+        "  Portfolio script: %s\n  Visualizer script: %s\n  Output directory: %s\n  Siyuan assets: %s\n"
+        "🚀 Starting server on http://127.0.0.1:5000",
+        PORTFOLIO_SCRIPT, VISUALIZER_SCRIPT, OUTPUT_DIR, SIYUAN_ASSETS_DIR
+    )
+
+    if os.getenv('DEV'):
+        # 开发模式：单进程调试服务器，修改代码自动重载
+        app.run(host='127.0.0.1', port=5000, debug=True)
+    else:
+        from hypercorn.config import Config
+        from hypercorn.run import run as hypercorn_run
+
+        # 多 worker：长时间的组合更新不会阻塞 health / news 请求
+        # /run-task 与 /generate-chart 通过 run.lock 跨 worker 串行，其余 worker 返回 409
+        config = Config()
+        config.application_path = 'bridge:app'
+        config.bind = ['127.0.0.1:5000']
+        config.workers = BRIDGE_WORKERS
+        config.use_reloader = '--reload' in sys.argv
+        log.info("Workers: %d", config.workers)
+        hypercorn_run(config)
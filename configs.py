@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -14,5 +15,18 @@ SIYUAN_ASSETS_DIR = SIYUAN_DATA_DIR / "assets"
 SIYUAN_JSON = SIYUAN_DATA_DIR / "storage" / "av" / f"{DB_TBL_NAME}.json"
 UNIFIED_HISTORY = OUTPUT_DIR / "portfolio_history_unified.csv"
 NEWS_HISTORY = OUTPUT_DIR / "portfolio_news_history.csv"
+UNIFIED_HISTORY_PARQUET = UNIFIED_HISTORY.with_suffix(".parquet")
+NEWS_HISTORY_PARQUET = NEWS_HISTORY.with_suffix(".parquet")
+# Latest news joined with Sector/EarningsDate, written by portfolio_exposure for the bridge
+NEWS_CONTEXT_PARQUET = OUTPUT_DIR / "news_with_context.parquet"
 CHART_HTML = OUTPUT_DIR / "portfolio_sectors_unified.html"
+# Only one portfolio update / chart generation writes to OUTPUT_DIR at a time (see scripts/run_lock.py)
+RUN_LOCK = OUTPUT_DIR / "run.lock"
+# Exit code of a script that found the lock held; the bridge answers 409 on it
+RUN_BUSY_EXIT_CODE = 75
 PYTHON_PATH = sys.executable
+# True: bridge imports the scripts once and calls run() in-process
+# False: each request spawns a fresh Python process (slower, but isolates crashes)
+RUN_IN_PROCESS = True
+# Hypercorn worker processes for the bridge; set DEV=1 to use the single-process debug server instead
+BRIDGE_WORKERS = max(2, (os.cpu_count() or 2) // 2)
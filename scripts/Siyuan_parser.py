@@ -1,5 +1,8 @@
 import json
+import re
+import numpy as np
 import pandas as pd
+from collections import defaultdict
 from datetime import datetime
 import sys
 import io
@@ -9,16 +12,32 @@ from configs import SIYUAN_JSON
 if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+# ---- 字段映射 ----
+# 请确保 "Price" 匹配你思源里的单价列名
+RENAME_MAP = {
+    "Event Type": "Event Type",
+    "Quantity": "Quantity",
+    "ticker": "ticker",
+    "日期": "Date",
+    "exclude": "exclude",
+    "price": "Price",  # <--- 如果你思源里叫“单价”，请改为 "单价": "price"
+    "TradeThesis": "thesis",
+    "CCY": "CCY",
+    "FX_CAD": "FX_COST"
+}
+
+# thesis 只保留以 10 位块 ID 开头的引用
+_THESIS_RX = re.compile(r'^\d{10}')
+
+
 def parse_siyuan_trades(json_path):
     with open(json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    rows = {}
-
-    def get_row(block_id):
-        if block_id not in rows:
-            rows[block_id] = {}
-        return rows[block_id]
+    # 按列收集 (SoA): col -> {block_id: value}
+    columns = defaultdict(dict)
+    # 按首次出现顺序记录所有行（dict 作有序集合）
+    block_ids = {}
 
     # 记录字段类型用于调试
     found_column_types = {}
@@ -27,36 +46,42 @@ def parse_siyuan_trades(json_path):
         col_name = kv["key"]["name"]
         col_type = kv["key"]["type"]
         found_column_types[col_name] = col_type
+        column = columns[col_name]
 
         for val in kv.get("values", []):
             block_id = val["blockID"]
-            row = get_row(block_id)
+            block_ids[block_id] = None
 
             # ---- SELECT (Event Type) ----
             if col_type == "select":
                 if val.get("mSelect"):
-                    row[col_name] = val["mSelect"][0]["content"]
+                    column[block_id] = val["mSelect"][0]["content"]
 
             # ---- NUMBER (Quantity, Price) ----
             elif col_type == "number":
                 num = val.get("number")
                 if num and num.get("isNotEmpty"):
-                    row[col_name] = num["content"]
+                    column[block_id] = num["content"]
 
             # ---- DATE ----
             elif col_type == "date":
                 date_obj = val.get("date")
                 if date_obj and date_obj.get("isNotEmpty"):
                     ts = date_obj["content"] / 1000
-                    row[col_name] = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+                    column[block_id] = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
 
             # ---- BLOCK / TEXT (ticker) ----
             elif col_type in ("block", "text"):
                 block = val.get("block") or val.get("text")
                 if block and block.get("content"):
-                    row[col_name] = block["content"]
+                    column[block_id] = block["content"]
 
-    df = pd.DataFrame.from_dict(rows, orient="index")
+    # 每列一次性组装，无需 from_dict 的行列转置
+    index = list(block_ids)
+    df = pd.DataFrame({
+        col: [vals.get(b, np.nan) for b in index]
+        for col, vals in columns.items() if vals
+    }, index=index)
 
     # ---- 调试：查看所有抓取到的列名 ----
     print("\n--- DEBUG: 字段检测 ---")
@@ -64,21 +89,8 @@ def parse_siyuan_trades(json_path):
         print(f"  - '{c}' (类型: {found_column_types.get(c)})")
     print("----------------------\n")
 
-    # ---- 字段映射 ----
-    # 请确保 "Price" 匹配你思源里的单价列名
-    rename_map = {
-        "Event Type": "Event Type",
-        "Quantity": "Quantity",
-        "ticker": "ticker",
-        "日期": "Date",
-        "exclude": "exclude",
-        "price": "Price",  # <--- 如果你思源里叫“单价”，请改为 "单价": "price"
-        "TradeThesis": "thesis",
-        "CCY": "CCY",
-        "FX_CAD": "FX_COST"
-    }
-    df = df.rename(columns=rename_map)
-    cond = df['thesis'].str.match(r'^\d{10}')
+    df = df.rename(columns=RENAME_MAP)
+    cond = df['thesis'].fillna('').str.match(_THESIS_RX)
     df.loc[~cond, 'thesis'] = ''
     # 确保必要列存在
     for col in ["ticker", "Quantity", "Price", "Date", "Event Type"]:
@@ -92,8 +104,10 @@ def parse_siyuan_trades(json_path):
     df["Price"] = pd.to_numeric(df["Price"], errors="coerce").fillna(0)
 
     # ---- 手动计算 Book Cost (毛价) ----
-    # 计算公式：数量 * 单价
-    df["book_cost"] = df["Quantity"] * df["Price"] * df["FX_COST"]
+    # 计算公式：数量 * 单价 * 汇率（直接在 float64 数组上相乘，只分配一次结果数组）
+    book_cost = df["Quantity"].to_numpy(dtype=np.float64) * df["Price"].to_numpy(dtype=np.float64)
+    book_cost *= df["FX_COST"].to_numpy(dtype=np.float64)
+    df["book_cost"] = book_cost
 
     print(f"✅ 已手动计算 book_cost (共 {len(df)} 行)")
 
@@ -1,17 +1,30 @@
 import pandas as pd
 import yfinance as yf
 import feedparser
+import csv
 import os
-from datetime import datetime, timedelta
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from dateutil import parser as date_parser
 from pathlib import Path
 import numpy as np
 from enum import Enum
 from typing import Tuple
 
+try:
+    # Optional: compile the position walk to machine code
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 # Import your existing parser
 from Siyuan_parser import parse_siyuan_trades
-from configs import OUTPUT_DIR, SIYUAN_JSON
+from configs import OUTPUT_DIR, SIYUAN_JSON, NEWS_CONTEXT_PARQUET, RUN_BUSY_EXIT_CODE
+from run_lock import exclusive_run, RunInProgress
 
 
 # =========================
@@ -56,6 +69,12 @@ class EventType(StrEnum):
 # Helper for filtering
 NORMAL_TRADE_TYPES = [EventType.BUY, EventType.SELL]
 
+# Collapses runs of whitespace in news titles
+_WHITESPACE_RX = re.compile(r'\s+')
+
+# Defaults for trade columns older SiYuan tables may not have
+OPTIONAL_TRADE_DEFAULTS = {PortfolioColumns.THESIS: "", PortfolioColumns.CCY: "CAD", PortfolioColumns.FX: 1.0}
+
 
 class YahooCols(StrEnum):
     TICKER = "ticker"
@@ -102,9 +121,76 @@ SNAPSHOT_DATETIME = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 # =========================
 # Core Logic
 # =========================
+def _walk_positions(codes, is_buy, qty, cost_raw, cost_fx, has_thesis, n_tickers):
+    """
+    Sequential weighted-average-cost walk over trades sorted by date.
+    State is kept per ticker code, so tickers may be interleaved.
+    cost_raw / cost_fx are the precomputed qty * price (* fx) of each trade.
+
+    Returns per-ticker arrays (shares, raw cost, base cost, open row, thesis row,
+    last row; -1 = none) and closed periods as (code, open row, close row).
+    """
+    total_shares = np.zeros(n_tickers)
+    total_cost_raw = np.zeros(n_tickers)  # e.g., USD
+    total_cost_fx = np.zeros(n_tickers)  # e.g., CAD (raw * fx)
+    open_idx = np.full(n_tickers, -1, dtype=np.int64)
+    thesis_idx = np.full(n_tickers, -1, dtype=np.int64)
+    last_idx = np.full(n_tickers, -1, dtype=np.int64)
+    closed = np.empty((len(codes), 3), dtype=np.int64)
+    n_closed = 0
+
+    for i in range(len(codes)):
+        c = codes[i]
+        last_idx[c] = i
+
+        if is_buy[i]:
+            if total_shares[c] == 0:
+                open_idx[c] = i
+            if has_thesis[i]:
+                thesis_idx[c] = i
+            # Add to both buckets
+            total_cost_raw[c] += cost_raw[i]
+            total_cost_fx[c] += cost_fx[i]
+            total_shares[c] += qty[i]
+
+        elif total_shares[c] > 0:
+            # Sell at the weighted average cost of both buckets
+            avg_cost_raw = total_cost_raw[c] / total_shares[c]
+            avg_cost_fx = total_cost_fx[c] / total_shares[c]
+
+            total_cost_raw[c] -= qty[i] * avg_cost_raw
+            total_cost_fx[c] -= qty[i] * avg_cost_fx
+            total_shares[c] -= qty[i]
+
+            if total_shares[c] <= 0:
+                closed[n_closed, 0] = c
+                closed[n_closed, 1] = open_idx[c]
+                closed[n_closed, 2] = i
+                n_closed += 1
+                open_idx[c] = -1
+                thesis_idx[c] = -1
+                total_shares[c] = 0.0
+                total_cost_raw[c] = 0.0
+                total_cost_fx[c] = 0.0
+
+    return total_shares, total_cost_raw, total_cost_fx, open_idx, thesis_idx, last_idx, closed[:n_closed]
+
+
+if HAS_NUMBA:
+    _walk_positions = njit(cache=True)(_walk_positions)
+    # Compile (or load from cache) at import, not on the first update
+    _walk_positions(np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.bool_), np.ones(1), np.ones(1),
+                    np.ones(1), np.zeros(1, dtype=np.bool_), 1)
+
+
 def build_aggregated_positions(trades: pd.DataFrame) -> Tuple[pd.DataFrame, dict]:
     print("Building aggregated positions...")
 
+    # Repeated strings as categoricals: isin / == / groupby then compare integer codes
+    trades = trades.astype({col: 'category' for col in (PortfolioColumns.TICKER, PortfolioColumns.EVENT_TYPE,
+                                                        PortfolioColumns.CCY, PortfolioColumns.EXCLUDE)
+                            if col in trades})
+
     # Filter for Buy/Sell and exclude nulls
     trade_events = trades[
         trades[PortfolioColumns.EVENT_TYPE].isin(NORMAL_TRADE_TYPES) &
@@ -118,97 +204,75 @@ def build_aggregated_positions(trades: pd.DataFrame) -> Tuple[pd.DataFrame, dict
         trade_events[PortfolioColumns.QUANTITY]
     )
 
-    book_cost_data = []
-    position_history = {}
-
-    for ticker in trade_events[PortfolioColumns.TICKER].unique():
-        ticker_trades = trade_events[trade_events[PortfolioColumns.TICKER] == ticker].sort_values(PortfolioColumns.DATE)
-
-        total_shares = 0
-        total_cost_raw = 0.0  # e.g., USD
-        total_cost_fx = 0.0  # e.g., CAD (raw * fx)
-
-        position_open_date = None
-        current_thesis = ""
-        position_closed_periods = []
-        ccy = "CAD"
-
-        for _, trade in ticker_trades.iterrows():
-            qty = trade[PortfolioColumns.QUANTITY]
-            price = trade.get(PortfolioColumns.PRICE, 0)
-            fx_rate = trade.get(PortfolioColumns.FX, 1)  # Default to 1 if no FX provided
-            ccy = trade.get(PortfolioColumns.CCY, "CAD")
-
-            if trade[PortfolioColumns.EVENT_TYPE] == EventType.BUY:
-                if total_shares == 0:
-                    position_open_date = trade[PortfolioColumns.DATE]
-
-                current_thesis = trade.get(PortfolioColumns.THESIS, "") or current_thesis
-                # Add to both buckets
-                trade_cost_raw = qty * price
-                trade_cost_fx = qty * price * fx_rate
-
-                total_cost_raw += trade_cost_raw
-                total_cost_fx += trade_cost_fx
-                total_shares += qty
-
-            elif trade[PortfolioColumns.EVENT_TYPE] == EventType.SELL:
-                if total_shares > 0:
-                    # Determine what proportion of the "buckets" are being sold
-                    # We use the weighted average cost for both
-                    avg_cost_raw = total_cost_raw / total_shares
-                    avg_cost_fx = total_cost_fx / total_shares
-
-                    total_cost_raw -= (qty * avg_cost_raw)
-                    total_cost_fx -= (qty * avg_cost_fx)
-                    total_shares -= qty
-
-                    if total_shares <= 0:
-                        position_closed_periods.append({
-                            'open_date': position_open_date,
-                            'close_date': trade[PortfolioColumns.DATE]
-                        })
-                        position_open_date = None
-                        current_thesis = ""
-                        total_shares = 0
-                        total_cost_raw = 0
-                        total_cost_fx = 0
-
-        is_open = total_shares > 0
-
-        # Calculate Averages for the open position
-        avg_book_cost_raw = (total_cost_raw / total_shares) if is_open else 0
-        avg_book_cost_fx = (total_cost_fx / total_shares) if is_open else 0
-        # The average FX rate is the ratio of the total CAD spent vs total USD spent
-        avg_fx_rate = (total_cost_fx / total_cost_raw) if (is_open and total_cost_raw > 0) else 1.0
-
-        position_history[ticker] = {
-            'current_open_date': position_open_date,
-            'closed_periods': position_closed_periods,
-            'is_open': is_open
-        }
+    # Ticker codes in first-appearance order, then one stable sort by date
+    # (trades on the same day keep their entry order)
+    codes, tickers = pd.factorize(trade_events[PortfolioColumns.TICKER], sort=False)
+    by_date = trade_events.assign(ticker_code=codes).sort_values(PortfolioColumns.DATE, kind='stable')
+    # Optional columns get their defaults in one pass, then everything is read as plain arrays
+    by_date = by_date.assign(**{col: default for col, default in OPTIONAL_TRADE_DEFAULTS.items()
+                                if col not in by_date})
+    dates = by_date[PortfolioColumns.DATE].to_numpy()
+    thesis = by_date[PortfolioColumns.THESIS]
+    ccy = by_date[PortfolioColumns.CCY].to_numpy()
+    fx = by_date[PortfolioColumns.FX].to_numpy(dtype=np.float64)
+    qty = by_date[PortfolioColumns.QUANTITY].to_numpy(dtype=np.float64)
+    # Trade costs in both currencies as whole-array ops; the walk only accumulates them
+    cost_raw = qty * by_date[PortfolioColumns.PRICE].to_numpy(dtype=np.float64)
+    cost_fx = cost_raw * fx
+
+    (total_shares, total_cost_raw, total_cost_fx,
+     open_idx, thesis_idx, last_idx, closed) = _walk_positions(
+        by_date["ticker_code"].to_numpy(dtype=np.int64),
+        (by_date[PortfolioColumns.EVENT_TYPE] == EventType.BUY).to_numpy(),
+        qty,
+        cost_raw,
+        cost_fx,
+        thesis.astype(bool).to_numpy(),
+        len(tickers)
+    )
+
+    closed_periods = [[] for _ in range(len(tickers))]
+    for code, open_i, close_i in closed:
+        closed_periods[code].append({'open_date': dates[open_i], 'close_date': dates[close_i]})
 
-        book_cost_data.append({
-            PortfolioColumns.TICKER: ticker,
-            # Costs in Raw Currency (e.g. USD)
-            PortfolioColumns.BOOK_COST: avg_book_cost_raw,
-            PortfolioColumns.COST_BASIS: total_cost_raw,
-            # Costs in Base Currency (e.g. CAD)
-            PortfolioColumns.BOOK_COST_BASE: avg_book_cost_fx,
-            PortfolioColumns.COST_BASIS_BASE: total_cost_fx,
-            # Average FX for the holding
-            PortfolioColumns.AVG_FX: avg_fx_rate,
-            PortfolioColumns.THESIS: current_thesis,
-            PortfolioColumns.CCY: ccy
-        })
-
-    book_cost_df = pd.DataFrame(book_cost_data)
+    is_open = total_shares > 0
+    position_history = {
+        ticker: {
+            'current_open_date': dates[open_idx[code]] if open_idx[code] >= 0 else None,
+            'closed_periods': closed_periods[code],
+            'is_open': bool(is_open[code])
+        }
+        for code, ticker in enumerate(tickers)
+    }
+
+    # Calculate Averages for the open position
+    avg_book_cost_raw = np.divide(total_cost_raw, total_shares, out=np.zeros(len(tickers)), where=is_open)
+    avg_book_cost_fx = np.divide(total_cost_fx, total_shares, out=np.zeros(len(tickers)), where=is_open)
+    # The average FX rate is the ratio of the total CAD spent vs total USD spent
+    avg_fx_rate = np.divide(total_cost_fx, total_cost_raw, out=np.ones(len(tickers)),
+                            where=is_open & (total_cost_raw > 0))
+
+    thesis_values = thesis.to_numpy()
+    book_cost_df = pd.DataFrame({
+        PortfolioColumns.TICKER: np.asarray(tickers, dtype=object),
+        # Costs in Raw Currency (e.g. USD)
+        PortfolioColumns.BOOK_COST: avg_book_cost_raw,
+        PortfolioColumns.COST_BASIS: total_cost_raw,
+        # Costs in Base Currency (e.g. CAD)
+        PortfolioColumns.BOOK_COST_BASE: avg_book_cost_fx,
+        PortfolioColumns.COST_BASIS_BASE: total_cost_fx,
+        # Average FX for the holding
+        PortfolioColumns.AVG_FX: avg_fx_rate,
+        PortfolioColumns.THESIS: [thesis_values[i] if i >= 0 else "" for i in thesis_idx],
+        PortfolioColumns.CCY: ccy[last_idx]
+    })
 
     # Aggregate shares
     positions = (
-        trade_events.groupby(PortfolioColumns.TICKER, as_index=False)["signed_qty"]
+        trade_events.groupby(PortfolioColumns.TICKER, as_index=False, observed=True)["signed_qty"]
         .sum()
         .rename(columns={"signed_qty": PortfolioColumns.SHARES})
+        .astype({PortfolioColumns.TICKER: object})  # plain strings for the per-ticker steps downstream
     )
 
     positions = positions[positions[PortfolioColumns.SHARES] > 0]
@@ -219,38 +283,42 @@ def build_aggregated_positions(trades: pd.DataFrame) -> Tuple[pd.DataFrame, dict
 
 def compute_dividends(positions, dividend_events, position_history: dict):
     print("Calculating dividends...")
-    dividend_totals = {}
-    dividend_total_base = {}
-    for ticker in positions[PortfolioColumns.TICKER]:
-        ticker_divs = dividend_events[dividend_events[PortfolioColumns.TICKER] == ticker]
-        total_div = 0
-        total_div_base = 0
-        pos_info = position_history.get(ticker)
-        if pos_info and pos_info['is_open']:
-            open_date = pos_info['current_open_date']
-            # Filter dividends that happened after current position opened
-            valid_divs = ticker_divs[ticker_divs[PortfolioColumns.DATE] >= open_date]
-            total_div = valid_divs[PortfolioColumns.BOOK_COST].sum()
-            total_div_base = valid_divs[PortfolioColumns.BOOK_COST].dot(valid_divs[PortfolioColumns.FX])
-
-        dividend_totals[ticker] = total_div
-        dividend_total_base[ticker] = total_div_base
-
-    positions[PortfolioColumns.DIVIDENDS] = positions[PortfolioColumns.TICKER].map(dividend_totals).fillna(0)
-    positions[PortfolioColumns.DIVIDENDS_BASE] =positions[PortfolioColumns.TICKER].map(dividend_total_base).fillna(0)
+    # Only dividends received since the current position opened count
+    open_dates = pd.Series({ticker: info['current_open_date']
+                            for ticker, info in position_history.items() if info['is_open']}, dtype=object)
+    # Categorical tickers: map/groupby work per distinct ticker, not per row
+    div_tickers = dividend_events[PortfolioColumns.TICKER].astype('category')
+    is_valid = dividend_events[PortfolioColumns.DATE] >= div_tickers.map(open_dates).astype(object)
+    valid_divs = dividend_events[is_valid]
+
+    # One grouped pass for both currencies
+    totals = pd.DataFrame({
+        PortfolioColumns.DIVIDENDS: valid_divs[PortfolioColumns.BOOK_COST],
+        PortfolioColumns.DIVIDENDS_BASE: valid_divs[PortfolioColumns.BOOK_COST] * valid_divs[PortfolioColumns.FX]
+    }).groupby(div_tickers[is_valid], observed=True).sum()
+
+    positions = positions.merge(totals, left_on=PortfolioColumns.TICKER, right_index=True, how='left')
+    positions[[PortfolioColumns.DIVIDENDS, PortfolioColumns.DIVIDENDS_BASE]] = \
+        positions[[PortfolioColumns.DIVIDENDS, PortfolioColumns.DIVIDENDS_BASE]].fillna(0)
     return positions
 
 
 def get_ccy(base_ccy, list_of_ccy):
-    fx_rates = {}
-
-    for ccy in list_of_ccy:
-        if ccy == base_ccy:
-            fx_rates[ccy] = 1.0
+    fx_rates = {ccy: 1.0 for ccy in list_of_ccy if ccy == base_ccy}
+    pairs = {f"{ccy}{base_ccy}=X": ccy for ccy in list_of_ccy if ccy != base_ccy}
+    if not pairs:
+        return fx_rates
+
+    # One request for all pairs instead of one per currency
+    df = yf.download(list(pairs), period="1d", interval="1d", progress=False)
+    close = df["Close"] if not df.empty else pd.DataFrame()
+
+    for ticker, ccy in pairs.items():
+        if ticker in close and close[ticker].notna().any():
+            fx_rates[ccy] = close[ticker].dropna().iloc[-1]
             continue
 
-        ticker = f"{ccy}{base_ccy}=X"
-
+        # Missing from the batch: retry this pair on its own
         df = yf.download(ticker, period="1d", interval="1d", progress=False)
 
         if df.empty:
@@ -260,6 +328,44 @@ def get_ccy(base_ccy, list_of_ccy):
 
     return fx_rates
 
+@lru_cache(maxsize=256)
+def get_ticker(ticker, snapshot_date):
+    """One yf.Ticker per ticker per snapshot day, shared by all lookups below"""
+    return yf.Ticker(ticker)
+
+
+@lru_cache(maxsize=256)
+def fetch_ticker_info(ticker, snapshot_date):
+    """Yahoo .info for one ticker, cached for the snapshot day"""
+    return get_ticker(ticker, snapshot_date).info
+
+
+@lru_cache(maxsize=256)
+def fetch_earnings_calendar(ticker, snapshot_date):
+    """Yahoo .calendar for one ticker, cached for the snapshot day"""
+    return get_ticker(ticker, snapshot_date).calendar
+
+
+@lru_cache(maxsize=256)
+def fetch_funds_data(ticker, snapshot_date):
+    """Yahoo .funds_data (ETF sector / asset class weights), cached for the snapshot day"""
+    return get_ticker(ticker, snapshot_date).funds_data
+
+
+def fetch_ticker_details(ticker):
+    """Blocking HTTP round-trips for one ticker; returns (info, calendar, error)"""
+    try:
+        info = fetch_ticker_info(ticker, SNAPSHOT_DATE)
+    except Exception as e:
+        return None, None, e
+    if info.get("quoteType") == "ETF":
+        return info, None, None
+    try:
+        return info, fetch_earnings_calendar(ticker, SNAPSHOT_DATE), None
+    except Exception as e:
+        return info, None, e
+
+
 def enrich_portfolio_data(positions):
     """Fetches Prices, Metadata, and Earnings in a more efficient way"""
     tickers = positions[PortfolioColumns.TICKER].tolist()
@@ -267,15 +373,21 @@ def enrich_portfolio_data(positions):
 
     # 1. Fetch Prices
     data = yf.download(tickers, period="1d", group_by="ticker", progress=False)
+    # group_by="ticker" nests columns under the ticker (older yfinance skips that for a single ticker)
+    per_ticker_columns = isinstance(data.columns, pd.MultiIndex)
+
+    # 2. Fetch Metadata & Earnings (.info / .calendar are per ticker, so fetch them concurrently)
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(tickers)))) as ex:
+        details = list(ex.map(fetch_ticker_details, tickers))
 
-    # 2. Fetch Metadata & Earnings (Ticker by Ticker for .info)
     meta_list = []
+    price_map = {}
     earnings_map = {}
 
-    for t in tickers:
+    for t, (info, cal, error) in zip(tickers, details):
         try:
-            t_obj = yf.Ticker(t)
-            info = t_obj.info
+            if info is None:
+                raise error
 
             # Metadata
             is_etf = info.get("quoteType") == "ETF"
@@ -287,15 +399,13 @@ def enrich_portfolio_data(positions):
                 YahooCols.QUOTE_TYPE: info.get("quoteType", "Unknown")
             })
 
-            # Current Price from Download or Info
-            if len(tickers) == 1:
-                positions.loc[positions[PortfolioColumns.TICKER] == t, YahooCols.PRICE] = data["Close"].iloc[-1]
-            else:
-                positions.loc[positions[PortfolioColumns.TICKER] == t, YahooCols.PRICE] = data[t]["Close"].iloc[-1]
+            # Current Price from Download or Info (assigned in one go after the loop)
+            price_map[t] = (data[t] if per_ticker_columns else data)["Close"].iloc[-1]
 
             # Earnings
             if not is_etf:
-                cal = t_obj.calendar
+                if error is not None:
+                    raise error
                 if cal is not None and "Earnings Date" in cal:
                     e_date = cal["Earnings Date"]
                     earnings_map[t] = str(e_date[0]) if isinstance(e_date, (list, pd.Series)) else str(e_date)
@@ -303,12 +413,17 @@ def enrich_portfolio_data(positions):
         except Exception as e:
             print(f"Error fetching {t}: {e}")
 
+    positions[YahooCols.PRICE] = positions[PortfolioColumns.TICKER].map(price_map)
+
     # Merge Metadata
     meta_df = pd.DataFrame(meta_list)
     positions = positions.merge(meta_df, on=PortfolioColumns.TICKER, how="left")
 
     # Add Earnings & Values
-    positions[YahooCols.EARNINGS_DATE] = positions[PortfolioColumns.TICKER].map(earnings_map)
+    positions = positions.merge(
+        pd.DataFrame({PortfolioColumns.TICKER: list(earnings_map), YahooCols.EARNINGS_DATE: list(earnings_map.values())},
+                     dtype=object),
+        on=PortfolioColumns.TICKER, how='left')
     positions[PortfolioColumns.VALUE] = positions[PortfolioColumns.SHARES] * positions[YahooCols.PRICE]
 
     # Calculate Unrealized P/L
@@ -318,39 +433,80 @@ def enrich_portfolio_data(positions):
     # compute base currency value
     # get currency rate
     fx_cur = get_ccy('CAD', positions[PortfolioColumns.CCY].unique())
-    positions[PortfolioColumns.CUR_FX] = positions[PortfolioColumns.CCY].map(fx_cur).fillna(1)
+    positions = positions.merge(
+        pd.DataFrame({PortfolioColumns.CCY: list(fx_cur), PortfolioColumns.CUR_FX: list(fx_cur.values())}),
+        on=PortfolioColumns.CCY, how='left')
+    positions[PortfolioColumns.CUR_FX] = positions[PortfolioColumns.CUR_FX].fillna(1)
     positions[PortfolioColumns.VALUE_BASE] = positions[PortfolioColumns.VALUE] * positions[PortfolioColumns.CUR_FX]
     positions[PortfolioColumns.PNL_BASE] = positions[PortfolioColumns.VALUE_BASE] - positions[PortfolioColumns.COST_BASIS_BASE]
     positions[PortfolioColumns.FX_PNL] = positions[PortfolioColumns.SHARES] * positions[PortfolioColumns.BOOK_COST] * (positions[PortfolioColumns.CUR_FX] - positions[PortfolioColumns.AVG_FX])
     return positions
 
 
+def news_feed_urls(ticker):
+    """RSS sources for one ticker: Yahoo Finance (Specific) + Google News (Wide aggregator)"""
+    clean_t = ticker.split(".")[0]
+    return [
+        f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={clean_t}&region=US&lang=en-US",
+        f"https://news.google.com/rss/search?q={clean_t}+stock+news&hl=en-US&gl=US&ceid=US:en"
+    ]
+
+
+def news_title_key(title):
+    """Dedup key for a headline: Yahoo / Google copies differ in whitespace and case, so compare a normalized prefix"""
+    return _WHITESPACE_RX.sub(' ', title).strip().lower()[:80]
+
+
+def parse_feed_date(text):
+    """RSS pubDate is RFC-822 (C-level email parser), ISO-8601 via fromisoformat; dateutil only as a last resort"""
+    try:
+        parsed = parsedate_to_datetime(text)
+        # RFC 2822 "-0000" means UTC, but the email parser returns a naive datetime
+        return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return date_parser.parse(text)
+
+
+def fetch_feed(url):
+    """Blocking RSS download + parse for one feed; returns (feed, error)"""
+    try:
+        return feedparser.parse(url), None
+    except Exception as e:
+        return None, e
+
+
 def get_news(tickers, thesis_dic, limit=5):
     print("Fetching News...")
     news_data = []
     cutoff_date = datetime.now().astimezone() - timedelta(days=90)
-    for t in tickers:
-        clean_t = t.split(".")[0]
-        try:
-            # 2. Define multiple RSS sources
-            # Yahoo Finance (Specific) + Google News (Wide aggregator)
-            rss_urls = [
-                f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={clean_t}&region=US&lang=en-US",
-                f"https://news.google.com/rss/search?q={clean_t}+stock+news&hl=en-US&gl=US&ceid=US:en"
-            ]
 
+    # 1. Every feed of every ticker is an independent HTTP round-trip, so fetch them all concurrently
+    ticker_urls = [news_feed_urls(t) for t in tickers]
+    all_urls = [url for urls in ticker_urls for url in urls]
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(all_urls)))) as ex:
+        fetched = iter(list(ex.map(fetch_feed, all_urls)))
+
+    for t, rss_urls in zip(tickers, ticker_urls):
+        # 2. Reassemble this ticker's feeds (same order as rss_urls)
+        feeds = [next(fetched) for _ in rss_urls]
+        try:
             collected_articles = []
             seen_titles = set()  # To avoid duplicates between sources
 
-            for url in rss_urls:
-                feed = feedparser.parse(url)
+            for feed, error in feeds:
+                if error is not None:
+                    raise error
 
                 for entry in feed.entries:
                     # Parse date
                     try:
                         # feedparser usually provides a structured time struct
                         if hasattr(entry, 'published'):
-                            article_date = date_parser.parse(entry.published)
+                            article_date = parse_feed_date(entry.published)
                         else:
                             # If no date is present, assume it is new enough or skip
                             continue
@@ -364,10 +520,11 @@ def get_news(tickers, thesis_dic, limit=5):
                             continue
 
                         # 4. Filter Duplicates
-                        if entry.title in seen_titles:
+                        title_key = news_title_key(entry.title)
+                        if title_key in seen_titles:
                             continue
 
-                        seen_titles.add(entry.title)
+                        seen_titles.add(title_key)
                         collected_articles.append({
                             'title': entry.get('title', ''),
                             'link': entry.get('link', ''),
@@ -403,6 +560,22 @@ def get_news(tickers, thesis_dic, limit=5):
     return news_df
 
 
+def fetch_etf_allocation(ticker):
+    """ETF sector weights for look-through; returns (sector_weights, total_weight, risk_category, error)"""
+    try:
+        funds_data = fetch_funds_data(ticker, SNAPSHOT_DATE)
+
+        # Get sector weights / asset class weights for risk categorization
+        sector_weights = getattr(funds_data, 'sector_weightings', None) or {}
+        asset_weights = getattr(funds_data, 'asset_classes', None) or {}
+
+        risk_cat = determine_etf_risk_category(asset_weights)
+        total_weight = sum(sector_weights.values()) if sector_weights else 0
+        return sector_weights, total_weight, risk_cat, None
+    except Exception as e:
+        return None, 0, None, e
+
+
 def apply_etf_lookthrough(positions):
     """
     Apply ETF look-through to expand holdings by sector/risk category
@@ -410,175 +583,111 @@ def apply_etf_lookthrough(positions):
     """
     print("Applying ETF look-through with currency preservation...")
 
-    expanded_rows = []
-
-    for _, row in positions.iterrows():
-        ticker = row[PortfolioColumns.TICKER]
-        quote_type = row.get(YahooCols.QUOTE_TYPE, "Unknown")
-
-        # For non-ETFs, keep as-is
-        if quote_type != "ETF":
-            expanded_rows.append({
-                'Symbol': ticker,
-                'Sector': row.get(YahooCols.SECTOR, 'Unknown'),
-                'RiskCategory': determine_risk_category(row),
-                'Shares': row[PortfolioColumns.SHARES],
-                'Price': row[YahooCols.PRICE],
-                'BookCost': row[PortfolioColumns.BOOK_COST],
-                'BookCost_BaseCcy': row[PortfolioColumns.BOOK_COST_BASE],
-                'Value': row[PortfolioColumns.VALUE],
-                'Value_BaseCcy': row[PortfolioColumns.VALUE_BASE],
-                'CostBasis': row[PortfolioColumns.COST_BASIS],
-                'CostBasis_BaseCcy': row[PortfolioColumns.COST_BASIS_BASE],
-                'UnrealizedPL': row[YahooCols.UNREALIZED_PL],
-                'UnrealizedPL_BaseCcy': row[PortfolioColumns.PNL_BASE],
-                'UnrealizedPL_Pct': (row[YahooCols.UNREALIZED_PL] / row[PortfolioColumns.COST_BASIS] * 100) if row[
-                                                                                                                   PortfolioColumns.COST_BASIS] > 0 else 0,
-                'TotalDividends': row[PortfolioColumns.DIVIDENDS],
-                'TotalDividends_BaseCcy': row[PortfolioColumns.DIVIDENDS_BASE],
-                'Source': 'Stock',
-                'EarningsDate': row.get(YahooCols.EARNINGS_DATE),
-                'Currency': row[PortfolioColumns.CCY],
-                'CurrentFX': row[PortfolioColumns.CUR_FX],
-                'AvgFX': row[PortfolioColumns.AVG_FX],
-                'FX_PnL': row[PortfolioColumns.FX_PNL],
-                'Thesis': row.get(PortfolioColumns.THESIS, '')
-            })
-            continue
-
-        # ETF look-through
-        try:
-            etf = yf.Ticker(ticker)
-            funds_data = etf.funds_data
-
-            # Get sector weights
-            sector_weights = {}
-            if hasattr(funds_data, 'sector_weightings') and funds_data.sector_weightings:
-                sector_weights = funds_data.sector_weightings
-
-            # Get asset class weights for risk categorization
-            asset_weights = {}
-            if hasattr(funds_data, 'asset_classes') and funds_data.asset_classes:
-                asset_weights = funds_data.asset_classes
-
+    positions = positions.reset_index(drop=True)
+    n_positions = len(positions)
+    if YahooCols.QUOTE_TYPE in positions:
+        quote_type = positions[YahooCols.QUOTE_TYPE]
+    else:
+        quote_type = pd.Series("Unknown", index=positions.index)
+    is_etf = (quote_type == "ETF").to_numpy()
+    etf_pos = np.flatnonzero(is_etf)
+
+    # ETF look-through: .funds_data is one network request per ticker, so fetch them concurrently
+    tickers = positions[PortfolioColumns.TICKER].to_numpy()
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(etf_pos)))) as ex:
+        allocations = list(ex.map(fetch_etf_allocation, tickers[etf_pos]))
+
+    # 1. Lay out the output first: one row per position, len(sector_weights) rows per ETF with a sector breakdown
+    counts = np.ones(n_positions, dtype=np.intp)
+    for pos, (sector_weights, _, _, error) in zip(etf_pos, allocations):
+        if error is None and sector_weights:
+            counts[pos] = len(sector_weights)
+    starts = np.cumsum(counts) - counts
+    take = np.repeat(np.arange(n_positions), counts)  # output row -> source position row
+    n_rows = len(take)
+
+    # 2. Preallocate column by column (SoA), then fill by slices
+    sector = np.empty(n_rows, dtype=object)
+    risk_cat = np.empty(n_rows, dtype=object)
+    source = np.empty(n_rows, dtype=object)
+    earnings = np.full(n_rows, None, dtype=object)
+    allocation_pct = np.ones(n_rows, dtype=np.float64)
+    is_lookthrough = np.zeros(n_rows, dtype=bool)
+
+    # For non-ETFs, keep as-is
+    rows = starts[~is_etf]
+    sector[rows] = positions[YahooCols.SECTOR].to_numpy()[~is_etf] if YahooCols.SECTOR in positions else 'Unknown'
+    risk_cat[rows] = determine_risk_category(quote_type[~is_etf]).to_numpy()
+    source[rows] = 'Stock'
+    if YahooCols.EARNINGS_DATE in positions:
+        earnings[rows] = positions[YahooCols.EARNINGS_DATE].to_numpy()[~is_etf]
+
+    for pos, ticker, (sector_weights, total_weight, etf_risk, error) in zip(etf_pos, tickers[etf_pos], allocations):
+        i0 = starts[pos]
+        if error is not None:
+            print(f"⚠️ Could not fetch ETF data for {ticker}: {error}")
+            # Fallback: treat as single position
+            sector[i0], risk_cat[i0], source[i0] = 'ETF - Unknown', 'Equity', 'ETF'
+        elif not sector_weights:
             # If no sector breakdown, treat as single allocation
-            if not sector_weights:
-                risk_cat = determine_etf_risk_category(asset_weights)
-                expanded_rows.append({
-                    'Symbol': ticker,
-                    'Sector': 'ETF - Diversified',
-                    'RiskCategory': risk_cat,
-                    'Shares': row[PortfolioColumns.SHARES],
-                    'Price': row[YahooCols.PRICE],
-                    'BookCost': row[PortfolioColumns.BOOK_COST],
-                    'BookCost_BaseCcy': row[PortfolioColumns.BOOK_COST_BASE],
-                    'Value': row[PortfolioColumns.VALUE],
-                    'Value_BaseCcy': row[PortfolioColumns.VALUE_BASE],
-                    'CostBasis': row[PortfolioColumns.COST_BASIS],
-                    'CostBasis_BaseCcy': row[PortfolioColumns.COST_BASIS_BASE],
-                    'UnrealizedPL': row[YahooCols.UNREALIZED_PL],
-                    'UnrealizedPL_BaseCcy': row[PortfolioColumns.PNL_BASE],
-                    'UnrealizedPL_Pct': (row[YahooCols.UNREALIZED_PL] / row[PortfolioColumns.COST_BASIS] * 100) if row[
-                                                                                                                       PortfolioColumns.COST_BASIS] > 0 else 0,
-                    'TotalDividends': row[PortfolioColumns.DIVIDENDS],
-                    'TotalDividends_BaseCcy': row[PortfolioColumns.DIVIDENDS_BASE],
-                    'Source': 'ETF',
-                    'EarningsDate': None,
-                    'Currency': row[PortfolioColumns.CCY],
-                    'CurrentFX': row[PortfolioColumns.CUR_FX],
-                    'AvgFX': row[PortfolioColumns.AVG_FX],
-                    'FX_PnL': row[PortfolioColumns.FX_PNL],
-                    'Thesis': row.get(PortfolioColumns.THESIS, '')
-                })
-                continue
-
+            sector[i0], risk_cat[i0], source[i0] = 'ETF - Diversified', etf_risk, 'ETF'
+        else:
             # Expand by sector with proportional allocation
-            total_weight = sum(sector_weights.values())
-
-            for sector, weight in sector_weights.items():
-                allocation_pct = weight / total_weight if total_weight > 0 else 0
-
-                # Allocate values proportionally
-                allocated_value = row[PortfolioColumns.VALUE] * allocation_pct
-                allocated_value_base = row[PortfolioColumns.VALUE_BASE] * allocation_pct
-                allocated_cost = row[PortfolioColumns.COST_BASIS] * allocation_pct
-                allocated_cost_base = row[PortfolioColumns.COST_BASIS_BASE] * allocation_pct
-                allocated_pl = row[YahooCols.UNREALIZED_PL] * allocation_pct
-                allocated_pl_base = row[PortfolioColumns.PNL_BASE] * allocation_pct
-                allocated_dividends = row[PortfolioColumns.DIVIDENDS] * allocation_pct
-                allocated_dividends_base = row[PortfolioColumns.DIVIDENDS_BASE] * allocation_pct
-                allocated_fx_pnl = row[PortfolioColumns.FX_PNL] * allocation_pct
-
-                risk_cat = determine_etf_risk_category(asset_weights)
-
-                expanded_rows.append({
-                    'Symbol': ticker,
-                    'Sector': sector,
-                    'RiskCategory': risk_cat,
-                    'Shares': row[PortfolioColumns.SHARES],  # Original shares
-                    'Price': row[YahooCols.PRICE],
-                    'BookCost': row[PortfolioColumns.BOOK_COST],
-                    'BookCost_BaseCcy': row[PortfolioColumns.BOOK_COST_BASE],
-                    'Value': allocated_value,  # Allocated by sector
-                    'Value_BaseCcy': allocated_value_base,
-                    'CostBasis': allocated_cost,
-                    'CostBasis_BaseCcy': allocated_cost_base,
-                    'UnrealizedPL': allocated_pl,
-                    'UnrealizedPL_BaseCcy': allocated_pl_base,
-                    'UnrealizedPL_Pct': (allocated_pl / allocated_cost * 100) if allocated_cost > 0 else 0,
-                    'TotalDividends': allocated_dividends,
-                    'TotalDividends_BaseCcy': allocated_dividends_base,
-                    'Source': f'ETF_Lookthrough_{ticker}',
-                    'EarningsDate': None,
-                    'Currency': row[PortfolioColumns.CCY],
-                    'CurrentFX': row[PortfolioColumns.CUR_FX],
-                    'AvgFX': row[PortfolioColumns.AVG_FX],
-                    'FX_PnL': allocated_fx_pnl,
-                    'Thesis': row.get(PortfolioColumns.THESIS, '')
-                })
-
-        except Exception as e:
-            print(f"⚠️ Could not fetch ETF data for {ticker}: {e}")
-            # Fallback: treat as single position
-            risk_cat = 'Equity'  # Default for ETFs
-            expanded_rows.append({
-                'Symbol': ticker,
-                'Sector': 'ETF - Unknown',
-                'RiskCategory': risk_cat,
-                'Shares': row[PortfolioColumns.SHARES],
-                'Price': row[YahooCols.PRICE],
-                'BookCost': row[PortfolioColumns.BOOK_COST],
-                'BookCost_BaseCcy': row[PortfolioColumns.BOOK_COST_BASE],
-                'Value': row[PortfolioColumns.VALUE],
-                'Value_BaseCcy': row[PortfolioColumns.VALUE_BASE],
-                'CostBasis': row[PortfolioColumns.COST_BASIS],
-                'CostBasis_BaseCcy': row[PortfolioColumns.COST_BASIS_BASE],
-                'UnrealizedPL': row[YahooCols.UNREALIZED_PL],
-                'UnrealizedPL_BaseCcy': row[PortfolioColumns.PNL_BASE],
-                'UnrealizedPL_Pct': (row[YahooCols.UNREALIZED_PL] / row[PortfolioColumns.COST_BASIS] * 100) if row[
-                                                                                                                   PortfolioColumns.COST_BASIS] > 0 else 0,
-                'TotalDividends': row[PortfolioColumns.DIVIDENDS],
-                'TotalDividends_BaseCcy': row[PortfolioColumns.DIVIDENDS_BASE],
-                'Source': 'ETF',
-                'EarningsDate': None,
-                'Currency': row[PortfolioColumns.CCY],
-                'CurrentFX': row[PortfolioColumns.CUR_FX],
-                'AvgFX': row[PortfolioColumns.AVG_FX],
-                'FX_PnL': row[PortfolioColumns.FX_PNL],
-                'Thesis': row.get(PortfolioColumns.THESIS, '')
-            })
-
-    expanded_df = pd.DataFrame(expanded_rows)
-
-    print(f"✓ Expanded to {len(expanded_df)} rows (from {len(positions)} positions)")
+            i1 = i0 + counts[pos]
+            sector[i0:i1] = list(sector_weights)
+            risk_cat[i0:i1] = etf_risk
+            source[i0:i1] = f'ETF_Lookthrough_{ticker}'
+            weights = np.fromiter(sector_weights.values(), dtype=np.float64, count=counts[pos])
+            allocation_pct[i0:i1] = weights / total_weight if total_weight > 0 else 0
+            is_lookthrough[i0:i1] = True
+
+    # 3. One gather per column; only look-through rows are scaled, the rest keep their values (and dtype)
+    def col(name, default=None):
+        return positions[name].to_numpy()[take] if name in positions else default
+
+    def allocated(name):
+        values = col(name)
+        return np.where(is_lookthrough, values * allocation_pct, values) if is_lookthrough.any() else values
+
+    cost = allocated(PortfolioColumns.COST_BASIS)
+    pl = allocated(YahooCols.UNREALIZED_PL)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pl_pct = np.where(cost > 0, pl / cost * 100, 0.0)
+
+    expanded_df = pd.DataFrame({
+        'Symbol': col(PortfolioColumns.TICKER),
+        'Sector': sector,
+        'RiskCategory': risk_cat,
+        'Shares': col(PortfolioColumns.SHARES),  # Original shares
+        'Price': col(YahooCols.PRICE),
+        'BookCost': col(PortfolioColumns.BOOK_COST),
+        'BookCost_BaseCcy': col(PortfolioColumns.BOOK_COST_BASE),
+        'Value': allocated(PortfolioColumns.VALUE),  # Allocated by sector
+        'Value_BaseCcy': allocated(PortfolioColumns.VALUE_BASE),
+        'CostBasis': cost,
+        'CostBasis_BaseCcy': allocated(PortfolioColumns.COST_BASIS_BASE),
+        'UnrealizedPL': pl,
+        'UnrealizedPL_BaseCcy': allocated(PortfolioColumns.PNL_BASE),
+        'UnrealizedPL_Pct': pl_pct,
+        'TotalDividends': allocated(PortfolioColumns.DIVIDENDS),
+        'TotalDividends_BaseCcy': allocated(PortfolioColumns.DIVIDENDS_BASE),
+        'Source': source,
+        'EarningsDate': earnings,
+        'Currency': col(PortfolioColumns.CCY),
+        'CurrentFX': col(PortfolioColumns.CUR_FX),
+        'AvgFX': col(PortfolioColumns.AVG_FX),
+        'FX_PnL': allocated(PortfolioColumns.FX_PNL),
+        'Thesis': col(PortfolioColumns.THESIS, ''),
+    })
+
+    print(f"✓ Expanded to {len(expanded_df)} rows (from {n_positions} positions)")
 
     return expanded_df
 
 
-def determine_risk_category(row):
-    """Determine risk category for a stock position"""
-    quote_type = row.get(YahooCols.QUOTE_TYPE, 'Stock')
-    return ASSET_RISK_MAPPING.get(quote_type, 'Equity')
+def determine_risk_category(quote_type):
+    """Determine risk category for stock positions from their quoteType column"""
+    return quote_type.map(ASSET_RISK_MAPPING).fillna('Equity')
 
 
 def determine_etf_risk_category(asset_weights):
@@ -608,6 +717,39 @@ def determine_etf_risk_category(asset_weights):
     return 'Equity'
 
 
+def read_history_file(csv_path, sep=',', encoding=None):
+    """
+    Read an existing history file before appending to it: the parquet sidecar when it is at least
+    as new as the CSV (typed, no re-parsing), otherwise the CSV via pyarrow's multithreaded parser
+    """
+    parquet_path = csv_path.with_suffix('.parquet')
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        return pd.read_parquet(parquet_path, engine='pyarrow')
+
+    # pyarrow infers YYYY-MM-DD as date objects; read date columns as strings so they compare with SNAPSHOT_DATE
+    header = pd.read_csv(csv_path, sep=sep, encoding=encoding, nrows=0).columns
+    date_cols = [c for c in header if c.lower().endswith('date')]
+    df = pd.read_csv(csv_path, sep=sep, encoding=encoding, engine='pyarrow', dtype={c: 'string' for c in date_cols})
+    df[date_cols] = df[date_cols].astype(object).where(df[date_cols].notna(), np.nan)
+    return df
+
+
+def read_csv_tail(csv_path, tail_bytes=1 << 16):
+    """
+    Return (header columns, last data row as a dict) without reading the whole CSV; row is None if there is none.
+    Only the header and the tail are read, to decide whether new rows can simply be appended
+    """
+    with open(csv_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]), [])
+        header_end = f.tell()
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(header_end, size - tail_bytes))
+        lines = [line for line in f.read().decode('utf-8', errors='replace').splitlines() if line.strip()]
+    if size <= header_end or not lines:
+        return header, None
+    return header, dict(zip(header, next(csv.reader([lines[-1]]))))
+
+
 def save_unified_snapshot(expanded_df, positions, dividend_events):
     """
     Save portfolio snapshot with currency information
@@ -653,11 +795,12 @@ def save_unified_snapshot(expanded_df, positions, dividend_events):
     unified_history_file = OUTPUT_DIR / "portfolio_history_unified.csv"
 
     if unified_history_file.exists():
-        existing_history = pd.read_csv(unified_history_file)
+        existing_history = read_history_file(unified_history_file)
         existing_history = existing_history[existing_history['Date'] != SNAPSHOT_DATE]
         snapshot = pd.concat([existing_history, snapshot], ignore_index=True)
 
     snapshot.to_csv(unified_history_file, index=False)
+    snapshot.to_parquet(unified_history_file.with_suffix('.parquet'), engine='pyarrow', compression='zstd', index=False)
     print(f"✓ Saved unified history: {unified_history_file}")
 
     return snapshot
@@ -672,17 +815,23 @@ def append_to_history(cur_snapshot, history_file="portfolio_history_unified.csv"
         cur_snapshot = cur_snapshot.copy()  # Avoid SettingWithCopy warning
         cur_snapshot["Date"] = SNAPSHOT_DATE
 
+    # When today's snapshot sorts entirely after the existing history and the columns are unchanged, only append the new rows to the CSV
+    append_only = False
+
     if unified_history_file.exists():
         print(f"\nAppending to existing history: {unified_history_file}")
 
         # 2. Read existing history
         try:
-            existing_history = pd.read_csv(unified_history_file)
+            existing_history = read_history_file(unified_history_file)
         except pd.errors.EmptyDataError:
             # Handle edge case where file exists but is empty
             existing_history = pd.DataFrame()
 
         if not existing_history.empty:
+            append_only = bool((existing_history['Date'] < SNAPSHOT_DATE).all()
+                               and (cur_snapshot['Date'] == SNAPSHOT_DATE).all())
+
             # 3. Deduplicate: Remove today's data if running update multiple times
             # Ensure column types match for comparison if necessary, but string usually works
             existing_history = existing_history[existing_history['Date'] != SNAPSHOT_DATE]
@@ -702,6 +851,13 @@ def append_to_history(cur_snapshot, history_file="portfolio_history_unified.csv"
         final_col_order = current_cols + [c for c in all_cols if c not in current_cols]
         updated_history = updated_history[final_col_order]
 
+        if append_only:
+            # Check the CSV itself: append only if its header matches and its last row predates today
+            # (no rows for today yet); otherwise rewrite it, which also clears duplicates left when CSV and parquet diverged
+            csv_header, csv_last_row = read_csv_tail(unified_history_file)
+            append_only = (csv_header == final_col_order and csv_last_row is not None
+                           and (csv_last_row.get('Date') or SNAPSHOT_DATE) < SNAPSHOT_DATE)
+
     else:
         print(f"\nCreating new unified history: {unified_history_file}")
         updated_history = cur_snapshot
@@ -716,10 +872,16 @@ def append_to_history(cur_snapshot, history_file="portfolio_history_unified.csv"
     if valid_sort_keys:
         updated_history = updated_history.sort_values(valid_sort_keys)
 
-    # 7. Save
-    updated_history.to_csv(unified_history_file, index=False)
+    # 7. Save (CSV for humans, parquet for fast typed reads by the bridge)
+    # run() holds the run lock, so no other run can write between the read above and this write
+    if append_only:
+        # Sorted by Date, the new rows are at the end: append just those to the CSV
+        updated_history.tail(len(cur_snapshot)).to_csv(unified_history_file, mode='a', header=False, index=False)
+    else:
+        updated_history.to_csv(unified_history_file, index=False)
+    updated_history.to_parquet(unified_history_file.with_suffix('.parquet'), engine='pyarrow', compression='zstd', index=False)
 
-    print(f"\n✓ Saved {len(cur_snapshot)} rows for {SNAPSHOT_DATE}")
+    print(f"\n✓ Saved {len(cur_snapshot)} rows for {SNAPSHOT_DATE}" + (" (appended)" if append_only else ""))
     print(f"✓ Total history: {len(updated_history)} rows across {updated_history['Date'].nunique()} dates")
 
 
@@ -731,7 +893,7 @@ def prepare_news_file(news_snapshot, ticker_list):
 
     if news_history_file.exists():
         print(f"  Appending to existing news history: {news_history_file}")
-        existing_news_history = pd.read_csv(news_history_file, sep='|', encoding='utf-8-sig')
+        existing_news_history = read_history_file(news_history_file, sep='|', encoding='utf-8-sig')
 
         # Remove today's data if it exists
         existing_news_history = existing_news_history[existing_news_history['Date'] != SNAPSHOT_DATE]
@@ -746,18 +908,52 @@ def prepare_news_file(news_snapshot, ticker_list):
     # Sort by date and ticker
     updated_news_history = updated_news_history.sort_values(['Date', 'ticker'])
 
-    # Save
+    # Save (CSV for humans, parquet for fast typed reads by the bridge)
     updated_news_history.to_csv(news_history_file, index=False, sep='|', encoding='utf-8-sig')
+    updated_news_history.to_parquet(news_history_file.with_suffix('.parquet'), engine='pyarrow', compression='zstd', index=False)
 
     print(f"✓ Saved {len(news_snapshot)} ticker news items for {SNAPSHOT_DATE}")
     print(
         f"✓ Total news history: {len(updated_news_history)} rows across {updated_news_history['Date'].nunique()} dates")
 
 
+def save_news_context(news_snapshot, cur_snapshot):
+    """
+    Save today's news joined with each ticker's Sector/EarningsDate,
+    so the bridge can serve /get-latest-news from a single file
+    """
+    # First row per symbol in history-file order (Sector, Symbol), as the bridge picks it
+    symbol_info = (
+        cur_snapshot.sort_values(['Sector', 'Symbol'])
+        .drop_duplicates('Symbol')[['Symbol', 'Sector', 'EarningsDate']]
+        .rename(columns={'Symbol': PortfolioColumns.TICKER, 'Sector': 'sector', 'EarningsDate': 'earnings_date'})
+    )
+    news_context = news_snapshot.merge(symbol_info, on=PortfolioColumns.TICKER, how='left', indicator='in_portfolio')
+    news_context['in_portfolio'] = news_context['in_portfolio'] == 'both'
+    news_context = news_context.sort_values(PortfolioColumns.TICKER)
+
+    news_context.to_parquet(NEWS_CONTEXT_PARQUET, engine='pyarrow', compression='zstd', index=False)
+    print(f"✓ Saved news context: {NEWS_CONTEXT_PARQUET}")
+
+
 # =========================
 # Execution
 # =========================
-if __name__ == "__main__":
+def run():
+    """
+    Parse trades, enrich positions and save the news and unified history files
+    Raises RunInProgress if another run is writing the output files
+    """
+    with exclusive_run():
+        _run()
+
+
+def _run():
+    global SNAPSHOT_DATE, SNAPSHOT_DATETIME
+    # Re-stamp on every run: the bridge imports this module once and keeps it loaded
+    SNAPSHOT_DATE = datetime.now().strftime("%Y-%m-%d")
+    SNAPSHOT_DATETIME = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
     # 1. Load
     raw_trades = parse_siyuan_trades(SIYUAN_JSON)
 
@@ -778,6 +974,15 @@ if __name__ == "__main__":
     # Final Output
     look_through_positions = apply_etf_lookthrough(positions)
     append_to_history(look_through_positions)
+    save_news_context(news_df, look_through_positions)
 
     print("\n" + "=" * 70)
-    print("✓ COMPLETE!")
\ No newline at end of file
+    print("✓ COMPLETE!")
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except RunInProgress as e:
+        print(f"⚠️ {e}")
+        raise SystemExit(RUN_BUSY_EXIT_CODE)
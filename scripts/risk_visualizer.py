@@ -4,25 +4,256 @@ Portfolio Visualizer for Unified History Format
 Works with portfolio_history_unified.csv that includes ETF look-through
 """
 
+import numpy as np
 import pandas as pd
+import base64
+import gzip
 import json
+import orjson
 from datetime import datetime
 from configs import OUTPUT_DIR
 from pathlib import Path
+import os
 import sys
-from configs import UNIFIED_HISTORY, CHART_HTML, NEWS_HISTORY
+from configs import UNIFIED_HISTORY, CHART_HTML, NEWS_HISTORY, RUN_BUSY_EXIT_CODE
+from run_lock import exclusive_run, RunInProgress
 
-# Ensure default recursion limit is high enough for complex HTML generation
-sys.setrecursionlimit(2000)
+
+# Low-cardinality label columns: categorical codes make every per-date groupby hash ints, not strings
+CATEGORY_COLS = ('Sector', 'RiskCategory', 'Currency', 'Source', 'Symbol')
 
 
 def load_unified_history(csv_path):
-    """Load unified portfolio history"""
-    df = pd.read_csv(csv_path)
+    """Load unified portfolio history (parquet sidecar when it is at least as new as the CSV)"""
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        df = pd.read_parquet(parquet_path, engine='pyarrow')
+    else:
+        # Read date columns as strings so pyarrow doesn't parse them into date objects
+        date_cols = ['Date', 'EarningsDate']
+        df = pd.read_csv(csv_path, engine='pyarrow', dtype={c: 'string' for c in date_cols})
+        date_cols = [c for c in date_cols if c in df]
+        df[date_cols] = df[date_cols].astype(object).where(df[date_cols].notna(), np.nan)
+        # Re-encode in the same layout portfolio_exposure writes, so either side can read it
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+
+    # Sidecars written by older runs may hold float32 columns; sum in float64
+    df = df.astype({c: 'float64' for c in df.select_dtypes('float32').columns})
+    df = df.astype({c: 'category' for c in CATEGORY_COLS if c in df})
     df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
     return df
 
 
+# Aggregated position column -> key used by the chart's JS
+POSITION_FIELDS = {
+    'Symbol': 'symbol',
+    'Value': 'value',
+    'Value_BaseCcy': 'value_base',
+    'Shares': 'shares',
+    'Price': 'price',
+    'BookCost': 'bookCost',
+    'BookCost_BaseCcy': 'bookCost_base',
+    'CostBasis': 'costBasis',
+    'CostBasis_BaseCcy': 'costBasis_base',
+    'UnrealizedPL': 'unrealizedPL',
+    'UnrealizedPL_BaseCcy': 'unrealizedPL_base',
+    'UnrealizedPL_Pct': 'unrealizedPL_Pct',
+    'TotalDividends': 'totalDividends',
+    'TotalDividends_BaseCcy': 'totalDividends_base',
+    'FX_PnL': 'fx_pnl',
+    'Currency': 'currency',
+    'CurrentFX': 'current_fx',
+    'AvgFX': 'avg_fx',
+    'Source': 'source',
+    'EarningsDate': 'earningsDate',
+}
+POSITION_FLOAT_COLS = ['Value', 'Value_BaseCcy', 'Shares', 'Price', 'BookCost', 'BookCost_BaseCcy', 'CostBasis',
+                       'CostBasis_BaseCcy', 'UnrealizedPL', 'UnrealizedPL_BaseCcy', 'UnrealizedPL_Pct',
+                       'TotalDividends', 'TotalDividends_BaseCcy', 'FX_PnL', 'CurrentFX', 'AvgFX']
+# Missing values shown as 0 (FX rates as 1.0); Value / Shares / Price stay as-is
+POSITION_FILL_DEFAULTS = {
+    'BookCost': 0, 'BookCost_BaseCcy': 0, 'CostBasis': 0, 'CostBasis_BaseCcy': 0,
+    'UnrealizedPL': 0, 'UnrealizedPL_BaseCcy': 0, 'UnrealizedPL_Pct': 0,
+    'TotalDividends': 0, 'TotalDividends_BaseCcy': 0, 'FX_PnL': 0,
+    'CurrentFX': 1.0, 'AvgFX': 1.0,
+}
+# Per (Date, Symbol) aggregation behind the positions list
+POSITION_AGG = {
+    'Value': 'sum',
+    'Value_BaseCcy': 'sum',
+    'Shares': 'first',
+    'Price': 'first',
+    'BookCost': 'first',
+    'BookCost_BaseCcy': 'first',
+    'CostBasis': 'sum',
+    'CostBasis_BaseCcy': 'sum',
+    'UnrealizedPL': 'sum',
+    'UnrealizedPL_BaseCcy': 'sum',
+    'UnrealizedPL_Pct': 'first',
+    'TotalDividends': 'sum',
+    'TotalDividends_BaseCcy': 'sum',
+    'FX_PnL': 'sum',
+    'Currency': 'first',
+    'CurrentFX': 'first',
+    'AvgFX': 'first',
+    'Source': 'first',
+    'EarningsDate': 'first',
+}
+# Per (Date, category, Symbol) aggregation behind the drill-down lists
+BREAKDOWN_AGG = {'Value': 'sum', 'Value_BaseCcy': 'sum', 'Source': 'first'}
+# Per-ticker news keys merged onto each position
+NEWS_FIELDS = ['hasNews', 'newsLink', 'thesis']
+# Marks where the (multi-MB) payload goes, so the page template never has to hold it
+PAYLOAD_SLOT = '@@PORTFOLIO_BLOB@@'
+
+
+def sorted_like(values, ordered):
+    """
+    values sorted descending; when ordered's index already gives that order (original-currency
+    totals usually rank like the base-currency ones), reuse it instead of sorting again
+    """
+    reordered = values.reindex(ordered.index)
+    return reordered if reordered.is_monotonic_decreasing else values.sort_values(ascending=False)
+
+
+def build_breakdown(contributions, totals_base, totals_orig):
+    """
+    Drill-down lists per category for one date, in base and original currency.
+    contributions is indexed by (category, Symbol) with both sums and the first Source;
+    categories follow totals_base order, symbols are sorted by base-currency value.
+    """
+    by_category = dict(tuple(contributions.groupby(level=0, observed=True, sort=False)))
+
+    breakdown_base = {}
+    breakdown_orig = {}
+    for category in totals_base.index:
+        category_value_base = totals_base.loc[category]
+        category_value_orig = totals_orig.loc[category]
+        symbols = by_category[category].droplevel(0).sort_values('Value_BaseCcy', ascending=False)
+
+        list_base = []
+        list_orig = []
+        for ticker, sym_value_orig, sym_value_base, source in symbols.itertuples(name=None):
+            badge = 'ETF' if source.startswith('ETF') else 'Stock'
+            list_base.append({
+                'symbol': ticker,
+                'value': sym_value_base,
+                'contribution': (sym_value_base / category_value_base * 100) if category_value_base > 0 else 0,
+                'source': badge
+            })
+            list_orig.append({
+                'symbol': ticker,
+                'value': sym_value_orig,
+                'contribution': (sym_value_orig / category_value_orig * 100) if category_value_orig > 0 else 0,
+                'source': badge
+            })
+
+        breakdown_base[category] = list_base
+        breakdown_orig[category] = list_orig
+
+    return breakdown_base, breakdown_orig
+
+
+def aggregate_history(df):
+    """
+    Run each groupby once over the whole history keyed by Date, then split the results per date.
+    Returns [(date, {name: frame without the Date level}), ...] in date order.
+    """
+    value_cols = ['Value', 'Value_BaseCcy']
+    aggregates = {
+        'sector_totals': df.groupby(['Date', 'Sector'], observed=True)[value_cols].sum(),
+        'risk_totals': df.groupby(['Date', 'RiskCategory'], observed=True)[value_cols].sum(),
+        'currency_totals': df.groupby(['Date', 'Currency'], observed=True)[value_cols].sum(),
+        'positions': df.groupby(['Date', 'Symbol'], observed=True).agg(POSITION_AGG),
+        'sector_contributions': df.groupby(['Date', 'Sector', 'Symbol'], observed=True).agg(BREAKDOWN_AGG),
+        'risk_contributions': df.groupby(['Date', 'RiskCategory', 'Symbol'], observed=True).agg(BREAKDOWN_AGG),
+    }
+    by_date = {
+        name: {date: group.droplevel(0) for date, group in frame.groupby(level=0, sort=False)}
+        for name, frame in aggregates.items()
+    }
+    # A date whose rows all lack e.g. a Sector still gets an (empty) frame
+    empty = {name: frame.iloc[:0].droplevel(0) for name, frame in aggregates.items()}
+
+    dates = pd.DatetimeIndex(df['Date'].dropna().unique()).sort_values()
+    return [(date, {name: by_date[name].get(date, empty[name]) for name in aggregates}) for date in dates]
+
+
+def build_date_payload(date, aggregates, date_news):
+    """
+    Chart payload for one history date from its aggregate_history() frames
+    (date_news: ticker-indexed NEWS_FIELDS frame), already encoded as JSON bytes
+    so only one date's dicts are alive at a time
+    """
+    # ====================================
+    # BASE CURRENCY VIEW (CAD)
+    # ====================================
+    # Totals stay as Series indexed by category: O(1) .loc lookups in the breakdown loops
+    sector_totals_base = aggregates['sector_totals']['Value_BaseCcy'].sort_values(ascending=False)
+    risk_totals_base = aggregates['risk_totals']['Value_BaseCcy'].sort_values(ascending=False)
+
+    # ====================================
+    # ORIGINAL CURRENCY VIEW
+    # ====================================
+    sector_totals_orig = sorted_like(aggregates['sector_totals']['Value'], sector_totals_base)
+    risk_totals_orig = sorted_like(aggregates['risk_totals']['Value'], risk_totals_base)
+
+    # Currency breakdown
+    currency_totals = aggregates['currency_totals']
+
+    # ====================================
+    # AGGREGATED POSITIONS
+    # ====================================
+    aggregated_positions = aggregates['positions'].reset_index().sort_values('Value_BaseCcy', ascending=False)
+
+    # NaN defaults and float casts once per column, then one records pass
+    positions = aggregated_positions.fillna(POSITION_FILL_DEFAULTS)
+    positions = positions.astype({c: 'float64' for c in POSITION_FLOAT_COLS})
+    positions['EarningsDate'] = positions['EarningsDate'].map(str, na_action='ignore').astype(object)
+    # categorical / string labels back to plain objects so missing values serialize as null
+    for col in ('Symbol', 'Currency', 'Source', 'EarningsDate'):
+        positions[col] = positions[col].astype(object).where(positions[col].notna(), None)
+    positions = positions[list(POSITION_FIELDS)].rename(columns=POSITION_FIELDS)
+    positions = positions.merge(date_news, left_on='symbol', right_index=True, how='left')
+    positions['hasNews'] = positions['hasNews'].eq(True)
+    positions['thesis'] = positions['thesis'].fillna('')
+    positions['newsLink'] = positions['newsLink'].astype(object).where(positions['newsLink'].notna(), None)
+    positions_list = positions.to_dict('records')
+
+    # ====================================
+    # BREAKDOWN DATA (for drill-down)
+    # ====================================
+    sector_breakdown_base, sector_breakdown_orig = build_breakdown(
+        aggregates['sector_contributions'], sector_totals_base, sector_totals_orig)
+    risk_breakdown_base, risk_breakdown_orig = build_breakdown(
+        aggregates['risk_contributions'], risk_totals_base, risk_totals_orig)
+
+    return orjson.dumps({
+        'date': date.strftime('%Y-%m-%d'),
+        # Base currency data
+        'sectors_base': sector_totals_base.index.tolist(),
+        'values_base': sector_totals_base.tolist(),
+        'risk_categories_base': risk_totals_base.index.tolist(),
+        'risk_values_base': risk_totals_base.tolist(),
+        'sector_breakdown_base': sector_breakdown_base,
+        'risk_breakdown_base': risk_breakdown_base,
+        # Original currency data
+        'sectors_orig': sector_totals_orig.index.tolist(),
+        'values_orig': sector_totals_orig.tolist(),
+        'risk_categories_orig': risk_totals_orig.index.tolist(),
+        'risk_values_orig': risk_totals_orig.tolist(),
+        'sector_breakdown_orig': sector_breakdown_orig,
+        'risk_breakdown_orig': risk_breakdown_orig,
+        # Currency breakdown
+        'currencies': currency_totals.index.tolist(),
+        'currency_values_orig': currency_totals['Value'].tolist(),
+        'currency_values_base': currency_totals['Value_BaseCcy'].tolist(),
+        # Positions
+        'positions': positions_list
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
 def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.html', base_currency='CAD'):
     """
     Generate interactive HTML with currency toggle
@@ -51,6 +282,18 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
         except Exception as e:
             print(f"⚠️ Could not load news data: {e}")
 
+    # News lookup per date: one frame indexed by ticker, merged onto positions
+    news_by_date = {}
+    if news_df is not None:
+        news_df['hasNews'] = news_df['news_1_title'].notna() if 'news_1_title' in news_df else False
+        news_df = news_df.rename(columns={'news_1_link': 'newsLink'})
+        news_df = news_df.reindex(columns=['Date', 'ticker'] + NEWS_FIELDS)
+        news_by_date = {
+            date: group.drop_duplicates('ticker', keep='last').set_index('ticker')[NEWS_FIELDS]
+            for date, group in news_df.groupby('Date')
+        }
+    no_news = pd.DataFrame(columns=NEWS_FIELDS)
+
     # Get unique dates
     dates = sorted(df['Date'].unique())
     date_strings = [d.strftime('%Y-%m-%d') for d in dates]
@@ -58,227 +301,12 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
     # Get all currencies present in the portfolio
     all_currencies = sorted(df['Currency'].dropna().unique().tolist())
 
-    # Prepare data for each date
-    data_by_date = []
-
-    for date in dates:
-        date_data = df[df['Date'] == date]
-
-        # Get news for this date
-        news_for_date = {}
-        if news_df is not None:
-            date_news = news_df[news_df['Date'] == date]
-            for _, news_row in date_news.iterrows():
-                ticker = news_row['ticker']
-                news_for_date[ticker] = {
-                    'has_news': bool(news_row.get('news_1_title')),
-                    'news_link': news_row.get('news_1_link', None),
-                    'thesis': news_row.get('thesis', '')
-                }
-
-        # ====================================
-        # BASE CURRENCY VIEW (CAD)
-        # ====================================
-        sector_totals_base = date_data.groupby('Sector')['Value_BaseCcy'].sum().reset_index()
-        sector_totals_base = sector_totals_base.sort_values('Value_BaseCcy', ascending=False)
-
-        risk_totals_base = date_data.groupby('RiskCategory')['Value_BaseCcy'].sum().reset_index()
-        risk_totals_base = risk_totals_base.sort_values('Value_BaseCcy', ascending=False)
-
-        # ====================================
-        # ORIGINAL CURRENCY VIEW
-        # ====================================
-        sector_totals_orig = date_data.groupby('Sector')['Value'].sum().reset_index()
-        sector_totals_orig = sector_totals_orig.sort_values('Value', ascending=False)
-
-        risk_totals_orig = date_data.groupby('RiskCategory')['Value'].sum().reset_index()
-        risk_totals_orig = risk_totals_orig.sort_values('Value', ascending=False)
-
-        # Currency breakdown
-        currency_totals = date_data.groupby('Currency').agg({
-            'Value': 'sum',
-            'Value_BaseCcy': 'sum'
-        }).reset_index()
-
-        # ====================================
-        # AGGREGATED POSITIONS
-        # ====================================
-        aggregated_positions = date_data.groupby('Symbol').agg({
-            'Value': 'sum',
-            'Value_BaseCcy': 'sum',
-            'Shares': 'first',
-            'Price': 'first',
-            'BookCost': 'first',
-            'BookCost_BaseCcy': 'first',
-            'CostBasis': 'sum',
-            'CostBasis_BaseCcy': 'sum',
-            'UnrealizedPL': 'sum',
-            'UnrealizedPL_BaseCcy': 'sum',
-            'UnrealizedPL_Pct': 'first',
-            'TotalDividends': 'sum',
-            'TotalDividends_BaseCcy': 'sum',
-            'FX_PnL': 'sum',
-            'Currency': 'first',
-            'CurrentFX': 'first',
-            'AvgFX': 'first',
-            'Source': 'first',
-            'EarningsDate': 'first'
-        }).reset_index().sort_values('Value_BaseCcy', ascending=False)
-
-        positions_list = []
-        for _, row in aggregated_positions.iterrows():
-            ticker = row['Symbol']
-            news_info = news_for_date.get(ticker, {'has_news': False, 'news_link': None, 'thesis': ''})
-
-            positions_list.append({
-                'symbol': ticker,
-                'value': float(row['Value']),
-                'value_base': float(row['Value_BaseCcy']),
-                'shares': float(row['Shares']),
-                'price': float(row['Price']),
-                'bookCost': float(row['BookCost']) if pd.notna(row['BookCost']) else 0,
-                'bookCost_base': float(row['BookCost_BaseCcy']) if pd.notna(row['BookCost_BaseCcy']) else 0,
-                'costBasis': float(row['CostBasis']) if pd.notna(row['CostBasis']) else 0,
-                'costBasis_base': float(row['CostBasis_BaseCcy']) if pd.notna(row['CostBasis_BaseCcy']) else 0,
-                'unrealizedPL': float(row['UnrealizedPL']) if pd.notna(row['UnrealizedPL']) else 0,
-                'unrealizedPL_base': float(row['UnrealizedPL_BaseCcy']) if pd.notna(row['UnrealizedPL_BaseCcy']) else 0,
-                'unrealizedPL_Pct': float(row['UnrealizedPL_Pct']) if pd.notna(row['UnrealizedPL_Pct']) else 0,
-                'totalDividends': float(row['TotalDividends']) if pd.notna(row['TotalDividends']) else 0,
-                'totalDividends_base': float(row['TotalDividends_BaseCcy']) if pd.notna(
-                    row['TotalDividends_BaseCcy']) else 0,
-                'fx_pnl': float(row['FX_PnL']) if pd.notna(row['FX_PnL']) else 0,
-                'currency': row['Currency'],
-                'current_fx': float(row['CurrentFX']) if pd.notna(row['CurrentFX']) else 1.0,
-                'avg_fx': float(row['AvgFX']) if pd.notna(row['AvgFX']) else 1.0,
-                'source': row['Source'],
-                'earningsDate': str(row['EarningsDate']) if pd.notna(row['EarningsDate']) else None,
-                'hasNews': news_info['has_news'],
-                'newsLink': news_info['news_link'],
-                'thesis': news_info['thesis']
-            })
-
-        # ====================================
-        # BREAKDOWN DATA (for drill-down)
-        # ====================================
-        # Sector breakdown
-        sector_breakdown_base = {}
-        sector_breakdown_orig = {}
-
-        for sector in sector_totals_base['Sector']:
-            sector_data = date_data[date_data['Sector'] == sector]
-            sector_value_base = sector_totals_base[sector_totals_base['Sector'] == sector]['Value_BaseCcy'].iloc[0]
-            sector_value_orig = sector_totals_orig[sector_totals_orig['Sector'] == sector]['Value'].iloc[0]
-
-            symbol_contributions_base = sector_data.groupby('Symbol')['Value_BaseCcy'].sum().reset_index()
-            symbol_contributions_base = symbol_contributions_base.sort_values('Value_BaseCcy', ascending=False)
-
-            symbol_contributions_orig = sector_data.groupby('Symbol')['Value'].sum().reset_index()
-            symbol_contributions_orig = symbol_contributions_orig.sort_values('Value', ascending=False)
-
-            breakdown_list_base = []
-            breakdown_list_orig = []
-
-            for _, sym_row in symbol_contributions_base.iterrows():
-                ticker = sym_row['Symbol']
-                sym_value_base = float(sym_row['Value_BaseCcy'])
-                contribution_pct_base = (sym_value_base / sector_value_base * 100) if sector_value_base > 0 else 0
-
-                sym_value_orig = float(
-                    symbol_contributions_orig[symbol_contributions_orig['Symbol'] == ticker]['Value'].iloc[0])
-                contribution_pct_orig = (sym_value_orig / sector_value_orig * 100) if sector_value_orig > 0 else 0
-
-                breakdown_list_base.append({
-                    'symbol': ticker,
-                    'value': sym_value_base,
-                    'contribution': contribution_pct_base,
-                    'source': 'ETF' if date_data[(date_data['Sector'] == sector) &
-                                                 (date_data['Symbol'] == ticker)]['Source'].iloc[0].startswith(
-                        'ETF') else 'Stock'
-                })
-
-                breakdown_list_orig.append({
-                    'symbol': ticker,
-                    'value': sym_value_orig,
-                    'contribution': contribution_pct_orig,
-                    'source': 'ETF' if date_data[(date_data['Sector'] == sector) &
-                                                 (date_data['Symbol'] == ticker)]['Source'].iloc[0].startswith(
-                        'ETF') else 'Stock'
-                })
-
-            sector_breakdown_base[sector] = breakdown_list_base
-            sector_breakdown_orig[sector] = breakdown_list_orig
-
-        # Risk category breakdown
-        risk_breakdown_base = {}
-        risk_breakdown_orig = {}
-
-        for risk_cat in risk_totals_base['RiskCategory']:
-            risk_data = date_data[date_data['RiskCategory'] == risk_cat]
-            risk_value_base = risk_totals_base[risk_totals_base['RiskCategory'] == risk_cat]['Value_BaseCcy'].iloc[0]
-            risk_value_orig = risk_totals_orig[risk_totals_orig['RiskCategory'] == risk_cat]['Value'].iloc[0]
-
-            symbol_contributions_base = risk_data.groupby('Symbol')['Value_BaseCcy'].sum().reset_index()
-            symbol_contributions_base = symbol_contributions_base.sort_values('Value_BaseCcy', ascending=False)
-
-            symbol_contributions_orig = risk_data.groupby('Symbol')['Value'].sum().reset_index()
-            symbol_contributions_orig = symbol_contributions_orig.sort_values('Value', ascending=False)
-
-            breakdown_list_base = []
-            breakdown_list_orig = []
-
-            for _, sym_row in symbol_contributions_base.iterrows():
-                ticker = sym_row['Symbol']
-                sym_value_base = float(sym_row['Value_BaseCcy'])
-                contribution_pct_base = (sym_value_base / risk_value_base * 100) if risk_value_base > 0 else 0
-
-                sym_value_orig = float(
-                    symbol_contributions_orig[symbol_contributions_orig['Symbol'] == ticker]['Value'].iloc[0])
-                contribution_pct_orig = (sym_value_orig / risk_value_orig * 100) if risk_value_orig > 0 else 0
-
-                breakdown_list_base.append({
-                    'symbol': ticker,
-                    'value': sym_value_base,
-                    'contribution': contribution_pct_base,
-                    'source': 'ETF' if date_data[(date_data['RiskCategory'] == risk_cat) &
-                                                 (date_data['Symbol'] == ticker)]['Source'].iloc[0].startswith(
-                        'ETF') else 'Stock'
-                })
-
-                breakdown_list_orig.append({
-                    'symbol': ticker,
-                    'value': sym_value_orig,
-                    'contribution': contribution_pct_orig,
-                    'source': 'ETF' if date_data[(date_data['RiskCategory'] == risk_cat) &
-                                                 (date_data['Symbol'] == ticker)]['Source'].iloc[0].startswith(
-                        'ETF') else 'Stock'
-                })
-
-            risk_breakdown_base[risk_cat] = breakdown_list_base
-            risk_breakdown_orig[risk_cat] = breakdown_list_orig
-
-        data_by_date.append({
-            'date': date.strftime('%Y-%m-%d'),
-            # Base currency data
-            'sectors_base': sector_totals_base['Sector'].tolist(),
-            'values_base': sector_totals_base['Value_BaseCcy'].tolist(),
-            'risk_categories_base': risk_totals_base['RiskCategory'].tolist(),
-            'risk_values_base': risk_totals_base['Value_BaseCcy'].tolist(),
-            'sector_breakdown_base': sector_breakdown_base,
-            'risk_breakdown_base': risk_breakdown_base,
-            # Original currency data
-            'sectors_orig': sector_totals_orig['Sector'].tolist(),
-            'values_orig': sector_totals_orig['Value'].tolist(),
-            'risk_categories_orig': risk_totals_orig['RiskCategory'].tolist(),
-            'risk_values_orig': risk_totals_orig['Value'].tolist(),
-            'sector_breakdown_orig': sector_breakdown_orig,
-            'risk_breakdown_orig': risk_breakdown_orig,
-            # Currency breakdown
-            'currencies': currency_totals['Currency'].tolist(),
-            'currency_values_orig': currency_totals['Value'].tolist(),
-            'currency_values_base': currency_totals['Value_BaseCcy'].tolist(),
-            # Positions
-            'positions': positions_list
-        })
+    # Prepare data for each date: the groupbys run once over the whole history, leaving only
+    # cheap per-date slicing and encoding (serial is faster than a process pool here)
+    data_by_date = [build_date_payload(date, aggregates, news_by_date.get(date, no_news))
+                    for date, aggregates in aggregate_history(df)]
+    # gzip + base64 keeps multi-MB histories small on disk; the page inflates it with DecompressionStream
+    portfolio_blob = base64.b64encode(gzip.compress(b'[' + b','.join(data_by_date) + b']', mtime=0)).decode('ascii')
 
     # Generate color palettes
     colors = [
@@ -306,13 +334,13 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
         'CHF': 'Fr'
     }
 
-    html_content = f"""<!DOCTYPE html>
+    html_template = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Multi-Currency Portfolio Analysis</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
+    <script id="chartJs" src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js" defer></script>
     <style>
         * {{
             margin: 0;
@@ -485,6 +513,23 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
             cursor: pointer;
         }}
 
+        .chart-tooltip {{
+            position: absolute;
+            top: 0;
+            left: 0;
+            pointer-events: none;
+            background: rgba(0, 0, 0, 0.8);
+            color: #fff;
+            padding: 6px 10px;
+            border-radius: 6px;
+            font-size: 12px;
+            white-space: nowrap;
+        }}
+
+        .chart-tooltip[hidden] {{
+            display: none;
+        }}
+
         .chart-hint {{
             text-align: center;
             color: #718096;
@@ -737,12 +782,14 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
             <div>
                 <div class="chart-container">
                     <canvas id="sectorChart"></canvas>
+                    <div class="chart-tooltip" hidden></div>
                 </div>
                 <div class="chart-hint">💡 Click a segment to see contributing positions</div>
             </div>
             <div>
                 <div class="chart-container">
                     <canvas id="riskChart"></canvas>
+                    <div class="chart-tooltip" hidden></div>
                 </div>
                 <div class="chart-hint">💡 Click a segment to see contributing positions</div>
             </div>
@@ -754,8 +801,47 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
         </div>
     </div>
 
+    <template id="positionTemplate">
+        <div class="position-item">
+            <div class="position-header">
+                <span class="position-symbol"></span>
+                <span class="position-badge"></span>
+            </div>
+            <div class="position-details">
+                <div class="position-shares"></div>
+                <div class="position-book">Book: <span class="book-cost"></span> | <span class="position-pl"></span><span class="position-extra"></span></div>
+            </div>
+            <div class="position-value"></div>
+            <div class="position-percent"></div>
+        </div>
+    </template>
+
+    <template id="breakdownHeaderTemplate">
+        <div style="background: #f7fafc; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+            <strong></strong>
+            <span style="color: #718096; font-size: 0.9em; margin-left: 15px;">Click "📋 All Positions" to return</span>
+            <button onclick="showAllPositions()" style="margin-left: 15px; padding: 6px 12px; border-radius: 6px; border: 1px solid #667eea; background: white; color: #667eea; cursor: pointer;">Back to All</button>
+        </div>
+    </template>
+
+    <template id="breakdownRowTemplate">
+        <div class="position-item">
+            <div>
+                <span class="position-symbol"></span>
+                <span class="position-badge"></span>
+            </div>
+            <div class="position-details">
+                <div></div>
+            </div>
+            <div class="position-value"></div>
+            <div class="position-percent"></div>
+        </div>
+    </template>
+
     <script>
-        const portfolioData = {json.dumps(data_by_date, indent=4)};
+        // Payload ships gzip + base64 and is inflated in the browser (see loadPortfolioData)
+        const portfolioBlob = "{PAYLOAD_SLOT}";
+        let portfolioData = [];
         const baseCurrency = '{base_currency}';
         const currencySymbols = {json.dumps(currency_symbols)};
 
@@ -770,25 +856,33 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
         let currentData = null;
         let currentTotal = 0;
         let currencyMode = 'base';  // 'base' or 'multi'
+        const positionRow = document.getElementById('positionTemplate').content.firstElementChild;
+
+        // Class names and styles reused by the render loops, defined once
+        const BADGE_ETF = 'badge-etf';
+        const BADGE_STOCK = 'badge-stock';
+        const PL_POSITIVE = 'pl-positive';
+        const PL_NEGATIVE = 'pl-negative';
+        const MUTED_PERCENT_CSS = 'color: #718096; font-size: 0.85em;';
 
         function getCurrencySymbol(currency) {{
             return currencySymbols[currency] || currency + ' ';
         }}
 
+        // Build the whole-number formatter once; toLocaleString re-resolves locale data on every call
+        const amountFormat = new Intl.NumberFormat('en-US', {{
+            minimumFractionDigits: 0,
+            maximumFractionDigits: 0
+        }});
+
         function formatCurrency(value, currency = null) {{
-            const absValue = Math.abs(value);
+            const ccy = currencyMode === 'base' || !currency ? baseCurrency : currency;
+            return getCurrencySymbol(ccy) + amountFormat.format(Math.abs(value));
+        }}
 
-            if (currencyMode === 'base' || !currency) {{
-                return getCurrencySymbol(baseCurrency) + absValue.toLocaleString('en-US', {{
-                    minimumFractionDigits: 0,
-                    maximumFractionDigits: 0
-                }});
-            }} else {{
-                return getCurrencySymbol(currency) + absValue.toLocaleString('en-US', {{
-                    minimumFractionDigits: 0,
-                    maximumFractionDigits: 0
-                }});
-            }}
+        // Prefix negatives with '-' before the currency symbol (formatCurrency only prints the absolute value)
+        function formatSigned(value, currency = null) {{
+            return (value < 0 ? '-' : '') + formatCurrency(value, currency);
         }}
 
         function toggleCurrency(mode) {{
@@ -806,156 +900,191 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
 
             // Refresh current view
             const slider = document.getElementById('dateSlider');
-            updateChart(parseInt(slider.value));
+            scheduleUpdate(parseInt(slider.value));
         }}
 
-        function updateChart(dateIndex) {{
-            const data = portfolioData[dateIndex];
-            currentData = data;
+        // Coalesce redraws into one animation frame, at most once per frame, using the latest date
+        let pendingIndex = null;
+        let updateFrame = 0;
 
-            // Select data based on currency mode
-            const sectors = currencyMode === 'base' ? data.sectors_base : data.sectors_orig;
-            const values = currencyMode === 'base' ? data.values_base : data.values_orig;
-            const riskCategories = currencyMode === 'base' ? data.risk_categories_base : data.risk_categories_orig;
-            const riskValues = currencyMode === 'base' ? data.risk_values_base : data.risk_values_orig;
+        function scheduleUpdate(dateIndex) {{
+            pendingIndex = dateIndex;
+            if (!updateFrame) {{
+                updateFrame = requestAnimationFrame(() => {{
+                    updateFrame = 0;
+                    updateChart(pendingIndex);
+                }});
+            }}
+        }}
 
-            const total = values.reduce((a, b) => a + b, 0);
-            currentTotal = total;
+        const currencyCollator = new Intl.Collator();
 
-            document.getElementById('currentDate').textContent = data.date;
+        // Summaries are computed once per snapshot and cached on the snapshot object
+        const aggCache = new WeakMap();
 
-            // Calculate stats
+        function computeAggregates(data) {{
+            const sumOf = arr => arr.reduce((a, b) => a + b, 0);
             let totalPL = 0;
             let totalDividends = 0;
             let totalFxPnL = 0;
+            const statsByCurrency = new Map();
+            const positions = data.positions;
+            for (let i = 0; i < positions.length; i++) {{
+                const pos = positions[i];
+                // Per-position derived fields are computed on the snapshot's first render and stored on pos
+                pos.isETF = Boolean(pos.source && pos.source.includes('ETF'));
+                pos.plClass = pos.unrealizedPL >= 0 ? PL_POSITIVE : PL_NEGATIVE;
+                pos.plPctText = pos.unrealizedPL_Pct.toFixed(1);
+                pos.absFxPnL = Math.abs(pos.fx_pnl);
+                pos.fxClass = `fx-pnl ${{pos.fx_pnl >= 0 ? 'fx-positive' : 'fx-negative'}}`;
+                pos.fxRateText = pos.current_fx.toFixed(4);
+                pos.fxInfo = ` | FX: ${{pos.fxRateText}} (avg: ${{pos.avg_fx.toFixed(4)}})`;
+                // The base view only shows '+'; the multi-currency view only shows '-'
+                pos.plSignBase = pos.unrealizedPL >= 0 ? '+' : '';
+                pos.plSignMulti = pos.unrealizedPL < 0 ? '-' : '';
+                pos.fxSignBase = pos.fx_pnl >= 0 ? '+' : '';
+                pos.fxSignMulti = pos.fx_pnl < 0 ? '-' : '';
+                totalPL += pos.unrealizedPL_base || 0;
+                totalDividends += pos.totalDividends_base || 0;
+                totalFxPnL += pos.fx_pnl || 0;
+
+                const key = `${{pos.currency}}`;
+                let stats = statsByCurrency.get(key);
+                if (!stats) {{
+                    stats = {{ value: 0, value_base: 0, pl: 0, dividends: 0, indices: [] }};
+                    statsByCurrency.set(key, stats);
+                }}
+                stats.indices.push(i);
+                stats.value += pos.value || 0;
+                stats.value_base += pos.value_base || 0;
+                stats.pl += pos.unrealizedPL || 0;
+                stats.dividends += pos.totalDividends || 0;
+            }}
 
-            if (currencyMode === 'base') {{
-                // CAD mode: Single totals
-                data.positions.forEach(pos => {{
-                    totalPL += pos.unrealizedPL_base || 0;
-                    totalDividends += pos.totalDividends_base || 0;
-                    totalFxPnL += pos.fx_pnl || 0;
-                }});
-
-                document.getElementById('totalValue').innerHTML = formatCurrency(total);
-
-                const plElement = document.getElementById('unrealizedPL');
-                const plSign = totalPL < 0 ? '-' : '';
-                plElement.innerHTML = `${{plSign}}${{formatCurrency(Math.abs(totalPL))}}`;
-                plElement.style.color = totalPL >= 0 ? '#4ade80' : '#f87171';
-
-                document.getElementById('totalDividends').innerHTML = formatCurrency(totalDividends);
-
-                const fxElement = document.getElementById('fxPnL');
-                const fxSign = totalFxPnL < 0 ? '-' : '';
-                fxElement.innerHTML = `${{fxSign}}${{formatCurrency(Math.abs(totalFxPnL))}}`;
-                fxElement.style.color = totalFxPnL >= 0 ? '#4ade80' : '#f87171';
-            }} else {{
-                // Multi-currency mode: Show breakdown by currency
-                const statsByCurrency = {{}};
-
-                data.positions.forEach(pos => {{
-                    if (!statsByCurrency[pos.currency]) {{
-                        statsByCurrency[pos.currency] = {{
-                            value: 0,
-                            value_base: 0,
-                            pl: 0,
-                            pl_base: 0,
-                            dividends: 0,
-                            dividends_base: 0,
-                            fx_pnl: 0
-                        }};
-                    }}
-                    statsByCurrency[pos.currency].value += pos.value || 0;
-                    statsByCurrency[pos.currency].value_base += pos.value_base || 0;
-                    statsByCurrency[pos.currency].pl += pos.unrealizedPL || 0;
-                    statsByCurrency[pos.currency].pl_base += pos.unrealizedPL_base || 0;
-                    statsByCurrency[pos.currency].dividends += pos.totalDividends || 0;
-                    statsByCurrency[pos.currency].dividends_base += pos.totalDividends_base || 0;
-                    statsByCurrency[pos.currency].fx_pnl += pos.fx_pnl || 0;
-                }});
+            // Sort currencies (CAD first); the rest use the collator, which matches localeCompare order
+            const currencies = [...statsByCurrency.keys()].filter(c => c !== baseCurrency).sort(currencyCollator.compare);
+            if (statsByCurrency.has(baseCurrency)) currencies.unshift(baseCurrency);
+            for (const stats of statsByCurrency.values()) stats.indices = Int32Array.from(stats.indices);
+
+            // Risk category colors depend only on the snapshot; map them once per mode
+            const colorsFor = categories => categories.map(cat => riskColors[cat] || '#C9CBCF');
+
+            return {{
+                total_base: sumOf(data.values_base),
+                total_orig: sumOf(data.values_orig),
+                riskColors_base: colorsFor(data.risk_categories_base),
+                riskColors_orig: colorsFor(data.risk_categories_orig),
+                totalPL, totalDividends, totalFxPnL,
+                statsByCurrency, currencies
+            }};
+        }}
 
-                // Sort currencies (CAD first)
-                const currencies = Object.keys(statsByCurrency).sort((a, b) => {{
-                    if (a === baseCurrency) return -1;
-                    if (b === baseCurrency) return 1;
-                    return a.localeCompare(b);
-                }});
+        function getAggregates(data) {{
+            let agg = aggCache.get(data);
+            if (!agg) {{
+                agg = computeAggregates(data);
+                aggCache.set(data, agg);
+            }}
+            return agg;
+        }}
 
-                // Dynamic font size adjustment to ensure fit
-                // If more than 2 currencies, reduce size slightly
-                const baseFontSize = currencies.length > 2 ? '1.1em' : '1.3em';
+        // Adjacent dates often hold the same positions; skip the Chart.js relayout when labels and values match
+        function sameValues(a, b) {{
+            if (a.length !== b.length) return false;
+            for (let i = 0; i < a.length; i++) {{
+                if (a[i] !== b[i]) return false;
+            }}
+            return true;
+        }}
 
-                // Build multi-line display for Total Value
-                let totalValueHtml = '';
-                currencies.forEach((currency) => {{
-                    const stats = statsByCurrency[currency];
-                    // Uniform styling for all currencies
-                    totalValueHtml += `<div style="font-size: ${{baseFontSize}};">${{formatCurrency(stats.value, currency)}}</div>`;
-                }});
-                document.getElementById('totalValue').innerHTML = totalValueHtml;
-
-                // Build multi-line display for Unrealized P&L
-                let plHtml = '';
-                totalPL = 0;
-
-                // Use base currency PnL when in base mode, original currency PnL when in original mode
-                if (currencyMode === 'base') {{
-                    // In base currency mode, sum all the base PnL values
-                    currencies.forEach((currency) => {{
-                        const stats = statsByCurrency[currency];
-                        totalPL += stats.pl_base;
+        // Draw tooltips on a separate layer above the chart so mouse moves don't repaint the whole doughnut
+        function attachOverlayTooltip(chart, canvas) {{
+            const tip = canvas.parentNode.querySelector('.chart-tooltip');
+            let hoverIndex = -1;
+            let hoverData = null;
+            canvas.addEventListener('mousemove', (e) => {{
+                const hit = chart.getElementsAtEventForMode(e, 'nearest', {{ intersect: true }}, false);
+                if (!hit.length) {{
+                    tip.hidden = true;
+                    hoverIndex = -1;
+                    return;
+                }}
+                const index = hit[0].index;
+                const values = chart.data.datasets[0].data;
+                if (index !== hoverIndex || values !== hoverData || tip.hidden) {{
+                    hoverIndex = index;
+                    hoverData = values;
+                    tip.textContent = chart.options.plugins.tooltip.callbacks.label({{
+                        label: chart.data.labels[index],
+                        parsed: values[index]
                     }});
+                    tip.hidden = false;
+                }}
+                tip.style.transform = `translate(${{e.offsetX + 12}}px, ${{e.offsetY + 12}}px)`;
+            }});
+            canvas.addEventListener('mouseleave', () => {{
+                tip.hidden = true;
+                hoverIndex = -1;
+            }});
+        }}
 
-                    // Display single total in base currency
-                    const plClass = totalPL >= 0 ? 'color: #4ade80;' : 'color: #f87171;';
-                    const plSign = totalPL < 0 ? '-' : '';
-                    plHtml = `<div style="font-size: ${{baseFontSize}}; ${{plClass}}">${{plSign}}${{formatCurrency(Math.abs(totalPL), baseCurrency)}}</div>`;
-                }} else {{
-                    // In original currency mode, show PnL per currency
-                    currencies.forEach((currency) => {{
-                        const stats = statsByCurrency[currency];
-                        totalPL += stats.pl;
-
-                        const plClass = stats.pl >= 0 ? 'color: #4ade80;' : 'color: #f87171;';
-                        const plSign = stats.pl < 0 ? '-' : '';
+        // Multi-currency KPI rows are cached per (element, currency); nodes are only added or removed when the currency set changes
+        const currencyRowNodes = new Map();
 
-                        plHtml += `<div style="font-size: ${{baseFontSize}}; ${{plClass}}">${{plSign}}${{formatCurrency(Math.abs(stats.pl), currency)}}</div>`;
-                    }});
+        function renderCurrencyRows(el, currencies, fontSize, rowFor) {{
+            let pool = currencyRowNodes.get(el.id);
+            if (!pool) {{
+                pool = new Map();
+                currencyRowNodes.set(el.id, pool);
+            }}
+            const rows = currencies.map(currency => {{
+                let row = pool.get(currency);
+                if (!row) {{
+                    row = document.createElement('div');
+                    pool.set(currency, row);
                 }}
-                document.getElementById('unrealizedPL').innerHTML = plHtml;
-
-                // Build multi-line display for Dividends
-                let divHtml = '';
-                totalDividends = 0;
-                currencies.forEach((currency) => {{
-                    const stats = statsByCurrency[currency];
-                    totalDividends += stats.dividends_base;
-                    divHtml += `<div style="font-size: ${{baseFontSize}};">${{formatCurrency(stats.dividends, currency)}}</div>`;
-                }});
-                document.getElementById('totalDividends').innerHTML = divHtml;
+                const [text, color] = rowFor(currency);
+                row.textContent = text;
+                row.style.fontSize = fontSize;
+                row.style.color = color;
+                return row;
+            }});
+            if (!sameValues(el.childNodes, rows)) el.replaceChildren(...rows);
+        }}
 
-                // FX P&L (always in CAD, so single value)
-                currencies.forEach(currency => {{
-                    totalFxPnL += statsByCurrency[currency].fx_pnl;
-                }});
+        let renderedData = null;
+        let renderedMode = null;
 
-                const fxElement = document.getElementById('fxPnL');
-                const fxSign = totalFxPnL < 0 ? '-' : '';
-                fxElement.innerHTML = `${{fxSign}}${{formatCurrency(Math.abs(totalFxPnL))}}`;
-                fxElement.style.color = totalFxPnL >= 0 ? '#4ade80' : '#f87171';
+        function updateChart(dateIndex) {{
+            const data = portfolioData[dateIndex];
+
+            // Charts and stats can't change for the same snapshot and currency mode; just restore the list if a drill-down replaced it
+            if (data === renderedData && currencyMode === renderedMode) {{
+                showAllPositions();
+                return;
             }}
+            renderedData = data;
+            renderedMode = currencyMode;
+            currentData = data;
+            const agg = getAggregates(data);
 
-            document.getElementById('sectorCount').textContent = sectors.length;
-            document.getElementById('largestSector').textContent = sectors[0];
-            document.getElementById('positionCount').textContent = data.positions.length;
-            document.getElementById('topRisk').textContent = riskCategories[0] || '-';
+            // Select data based on currency mode
+            const sectors = currencyMode === 'base' ? data.sectors_base : data.sectors_orig;
+            const values = currencyMode === 'base' ? data.values_base : data.values_orig;
+            const riskCategories = currencyMode === 'base' ? data.risk_categories_base : data.risk_categories_orig;
+            const riskValues = currencyMode === 'base' ? data.risk_values_base : data.risk_values_orig;
 
+            const total = currencyMode === 'base' ? agg.total_base : agg.total_orig;
+            currentTotal = total;
+
+            // Update charts first (a new Chart.js chart measures its canvas), then write all text, avoiding forced synchronous layout
             // Update or create sector chart
             if (sectorChart) {{
-                sectorChart.data.labels = sectors;
-                sectorChart.data.datasets[0].data = values;
-                sectorChart.update('none');
+                if (!sameValues(sectorChart.data.labels, sectors) || !sameValues(sectorChart.data.datasets[0].data, values)) {{
+                    sectorChart.data.labels = sectors;
+                    sectorChart.data.datasets[0].data = values;
+                    sectorChart.update('none');
+                }}
             }} else {{
                 sectorChart = new Chart(sectorCtx, {{
                     type: 'doughnut',
@@ -978,6 +1107,7 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                                 showSectorBreakdown(sector);
                             }}
                         }},
+                        events: ['click'],
                         plugins: {{
                             title: {{
                                 display: true,
@@ -992,6 +1122,7 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                                 }}
                             }},
                             tooltip: {{
+                                enabled: false,
                                 callbacks: {{
                                     label: function(context) {{
                                         const label = context.label || '';
@@ -1004,16 +1135,19 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                         }}
                     }}
                 }});
+                attachOverlayTooltip(sectorChart, sectorCtx.canvas);
             }}
 
             // Update or create risk chart
-            const riskChartColors = riskCategories.map(cat => riskColors[cat] || '#C9CBCF');
+            const riskChartColors = currencyMode === 'base' ? agg.riskColors_base : agg.riskColors_orig;
 
             if (riskChart) {{
-                riskChart.data.labels = riskCategories;
-                riskChart.data.datasets[0].data = riskValues;
-                riskChart.data.datasets[0].backgroundColor = riskChartColors;
-                riskChart.update('none');
+                if (!sameValues(riskChart.data.labels, riskCategories) || !sameValues(riskChart.data.datasets[0].data, riskValues)) {{
+                    riskChart.data.labels = riskCategories;
+                    riskChart.data.datasets[0].data = riskValues;
+                    riskChart.data.datasets[0].backgroundColor = riskChartColors;
+                    riskChart.update('none');
+                }}
             }} else {{
                 riskChart = new Chart(riskCtx, {{
                     type: 'doughnut',
@@ -1036,6 +1170,7 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                                 showRiskBreakdown(riskCat);
                             }}
                         }},
+                        events: ['click'],
                         plugins: {{
                             title: {{
                                 display: true,
@@ -1050,6 +1185,7 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                                 }}
                             }},
                             tooltip: {{
+                                enabled: false,
                                 callbacks: {{
                                     label: function(context) {{
                                         const label = context.label || '';
@@ -1062,197 +1198,256 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                         }}
                     }}
                 }});
+                attachOverlayTooltip(riskChart, riskCtx.canvas);
+            }}
+
+            document.getElementById('currentDate').textContent = data.date;
+
+            if (currencyMode === 'base') {{
+                // CAD mode: Single totals
+                const {{ totalPL, totalDividends, totalFxPnL }} = agg;
+
+                document.getElementById('totalValue').textContent = formatCurrency(total);
+
+                const plElement = document.getElementById('unrealizedPL');
+                plElement.textContent = formatSigned(totalPL);
+                plElement.style.color = totalPL >= 0 ? '#4ade80' : '#f87171';
+
+                document.getElementById('totalDividends').textContent = formatCurrency(totalDividends);
+
+                const fxElement = document.getElementById('fxPnL');
+                fxElement.textContent = formatSigned(totalFxPnL);
+                fxElement.style.color = totalFxPnL >= 0 ? '#4ade80' : '#f87171';
+            }} else {{
+                // Multi-currency mode: Show breakdown by currency
+                const {{ statsByCurrency, currencies, totalFxPnL }} = agg;
+
+                // Dynamic font size adjustment to ensure fit
+                // If more than 2 currencies, reduce size slightly
+                const baseFontSize = currencies.length > 2 ? '1.1em' : '1.3em';
+
+                // One Value / P&L / Dividends row per currency; row nodes are reused and only their text and color change
+                renderCurrencyRows(document.getElementById('totalValue'), currencies, baseFontSize,
+                    currency => [formatCurrency(statsByCurrency.get(currency).value, currency), '']);
+                renderCurrencyRows(document.getElementById('unrealizedPL'), currencies, baseFontSize, currency => {{
+                    const pl = statsByCurrency.get(currency).pl;
+                    return [formatSigned(pl, currency), pl >= 0 ? '#4ade80' : '#f87171'];
+                }});
+                renderCurrencyRows(document.getElementById('totalDividends'), currencies, baseFontSize,
+                    currency => [formatCurrency(statsByCurrency.get(currency).dividends, currency), '']);
+
+                // FX P&L (always in CAD, so single value)
+                const fxElement = document.getElementById('fxPnL');
+                fxElement.textContent = formatSigned(totalFxPnL);
+                fxElement.style.color = totalFxPnL >= 0 ? '#4ade80' : '#f87171';
             }}
 
+            document.getElementById('sectorCount').textContent = sectors.length;
+            document.getElementById('largestSector').textContent = sectors[0];
+            document.getElementById('positionCount').textContent = data.positions.length;
+            document.getElementById('topRisk').textContent = riskCategories[0] || '-';
+
             showAllPositions();
         }}
 
-        function showAllPositions() {{
-            if (!currentData) return;
+        function makeEl(tag, cssText, text) {{
+            const node = document.createElement(tag);
+            if (cssText) node.style.cssText = cssText;
+            if (text !== undefined) node.textContent = text;
+            return node;
+        }}
 
-            document.getElementById('detailsTitle').textContent = '📋 All Positions';
+        // One position row cloned from #positionTemplate; view carries the per-mode amounts and labels
+        function buildPositionNode(pos, view) {{
+            const node = positionRow.cloneNode(true);
+
+            node.querySelector('.position-symbol').textContent = pos.symbol;
+            const sourceBadge = node.querySelector('.position-badge');
+            sourceBadge.classList.add(pos.isETF ? BADGE_ETF : BADGE_STOCK);
+            sourceBadge.textContent = pos.isETF ? 'ETF' : 'Stock';
+
+            const badges = [];
+            if (pos.earningsDate) {{
+                const earnings = makeEl('span', null, '📅');
+                earnings.className = 'earnings-badge';
+                earnings.dataset.date = `Next earnings: ${{pos.earningsDate}}`;
+                badges.push(earnings);
+            }}
+            if (pos.hasNews && pos.newsLink) {{
+                const news = makeEl('a', null, '📰');
+                news.href = pos.newsLink;
+                news.target = '_blank';
+                news.className = 'news-icon';
+                news.title = 'View latest news';
+                badges.push(news);
+            }}
+            if (view.currencyBadge) {{
+                const currencyBadge = makeEl('span', null, `${{pos.currency}}`);
+                currencyBadge.className = 'currency-badge';
+                badges.push(currencyBadge);
+            }}
+            if (badges.length) node.querySelector('.position-header').append(' ', ...badges);
 
-            const detailsDiv = document.getElementById('detailsContent');
-            let html = '';
+            node.querySelector('.position-shares').textContent =
+                `${{pos.shares.toFixed(2)}} shares @ ${{formatCurrency(pos.price, view.priceCurrency)}}`;
+            node.querySelector('.book-cost').textContent = formatCurrency(view.bookCost, view.displayCurrency);
 
-            if (currencyMode === 'base') {{
-                // CAD mode: Show all positions in one list
-                html += '<div class="position-grid">';
+            const pl = node.querySelector('.position-pl');
+            pl.classList.add(pos.plClass);
+            pl.textContent = `${{view.plSign}}${{formatCurrency(pos.unrealizedPL, view.displayCurrency)}} (${{view.plSign}}${{pos.plPctText}}%)`;
 
-                currentData.positions.forEach(pos => {{
-                    const value = pos.value_base;
-                    const bookCost = pos.bookCost_base;
-                    const dividends = pos.totalDividends_base;
+            const dividendText = view.dividends > 0 ? ` | Div: ${{formatCurrency(view.dividends, view.displayCurrency)}}` : '';
+            node.querySelector('.position-extra').textContent = dividendText + view.fxInfo;
 
-                    const posPercent = (value / currentTotal * 100).toFixed(1);
-                    const isETF = pos.source && pos.source.includes('ETF');
-                    const sourceLabel = isETF ? 'ETF' : 'Stock';
-                    const badgeClass = isETF ? 'badge-etf' : 'badge-stock';
+            if (pos.absFxPnL > 0.01) {{
+                const fxPnl = makeEl('div', null,
+                    `FX P&L: ${{view.fxSign}}${{formatCurrency(pos.absFxPnL, view.fxCurrency)}}`);
+                fxPnl.className = pos.fxClass;
+                node.querySelector('.position-details').appendChild(fxPnl);
+            }}
 
-                    const plClass = pos.unrealizedPL >= 0 ? 'pl-positive' : 'pl-negative';
-                    const plSign = pos.unrealizedPL >= 0 ? '+' : '';
+            node.querySelector('.position-value').textContent = formatCurrency(view.value, view.displayCurrency);
+            const percent = node.querySelector('.position-percent');
+            percent.textContent = view.percentText;
+            if (view.percentMuted) percent.style.cssText = MUTED_PERCENT_CSS;
 
-                    const fxClass = pos.fx_pnl >= 0 ? 'fx-positive' : 'fx-negative';
-                    const fxSign = pos.fx_pnl >= 0 ? '+' : '';
+            return node;
+        }}
 
-                    const hasDividends = dividends > 0;
-                    const dividendText = hasDividends ? ` | Div: ${{formatCurrency(dividends)}}` : '';
+        // Snapshot and currency mode the positions list currently shows; drill-down views clear it
+        let listedData = null;
+        let listedMode = null;
 
-                    const fxPnlText = Math.abs(pos.fx_pnl) > 0.01
-                        ? `<div class="fx-pnl ${{fxClass}}">FX P&L: ${{fxSign}}${{formatCurrency(Math.abs(pos.fx_pnl))}}</div>`
-                        : '';
+        function showAllPositions() {{
+            if (!currentData) return;
+            if (listedData === currentData && listedMode === currencyMode) return;
+            listedData = currentData;
+            listedMode = currencyMode;
 
-                    let badges = '';
-                    if (pos.earningsDate) {{
-                        badges += `<span class="earnings-badge" data-date="Next earnings: ${{pos.earningsDate}}">📅</span>`;
-                    }}
-                    if (pos.hasNews && pos.newsLink) {{
-                        badges += `<a href="${{pos.newsLink}}" target="_blank" class="news-icon" title="View latest news">📰</a>`;
-                    }}
-                    if (pos.currency !== baseCurrency) {{
-                        badges += `<span class="currency-badge">${{pos.currency}}</span>`;
-                    }}
+            document.getElementById('detailsTitle').textContent = '📋 All Positions';
 
-                    html += `
-                        <div class="position-item">
-                            <div>
-                                <span class="position-symbol">${{pos.symbol}}</span>
-                                <span class="position-badge ${{badgeClass}}">${{sourceLabel}}</span>
-                                ${{badges}}
-                            </div>
-                            <div class="position-details">
-                                <div>${{pos.shares.toFixed(2)}} shares @ ${{formatCurrency(pos.price, pos.currency)}}</div>
-                                <div>Book: ${{formatCurrency(bookCost)}} | 
-                                    <span class="${{plClass}}">${{plSign}}${{formatCurrency(Math.abs(pos.unrealizedPL), pos.currency)}} (${{plSign}}${{pos.unrealizedPL_Pct.toFixed(1)}}%)</span>
-                                    ${{dividendText}}
-                                </div>
-                                ${{fxPnlText}}
-                            </div>
-                            <div class="position-value">${{formatCurrency(value)}}</div>
-                            <div class="position-percent">${{posPercent}}%</div>
-                        </div>
-                    `;
-                }});
+            const detailsDiv = document.getElementById('detailsContent');
+            const frag = document.createDocumentFragment();
 
-                html += '</div>';
-            }} else {{
-                // Multi-currency mode: Group by currency
-                const positionsByCurrency = {{}};
+            if (currencyMode === 'base') {{
+                // CAD mode: Show all positions in one list
+                const grid = makeEl('div');
+                grid.className = 'position-grid';
 
                 currentData.positions.forEach(pos => {{
-                    if (!positionsByCurrency[pos.currency]) {{
-                        positionsByCurrency[pos.currency] = [];
-                    }}
-                    positionsByCurrency[pos.currency].push(pos);
+                    grid.appendChild(buildPositionNode(pos, {{
+                        value: pos.value_base,
+                        bookCost: pos.bookCost_base,
+                        dividends: pos.totalDividends_base,
+                        plSign: pos.plSignBase,
+                        fxSign: pos.fxSignBase,
+                        displayCurrency: null,
+                        priceCurrency: pos.currency,
+                        fxCurrency: null,
+                        fxInfo: '',
+                        currencyBadge: pos.currency !== baseCurrency,
+                        percentText: `${{(pos.value_base / currentTotal * 100).toFixed(1)}}%`,
+                        percentMuted: false
+                    }}));
                 }});
 
-                // Sort currencies: CAD first, then alphabetically
-                const currencies = Object.keys(positionsByCurrency).sort((a, b) => {{
-                    if (a === baseCurrency) return -1;
-                    if (b === baseCurrency) return 1;
-                    return a.localeCompare(b);
-                }});
+                frag.appendChild(grid);
+            }} else {{
+                // Multi-currency mode: Group by currency
+                // Group indices and subtotals are precomputed with the snapshot summary (CAD first)
+                const {{ statsByCurrency, currencies }} = getAggregates(currentData);
 
                 currencies.forEach(currency => {{
-                    const positions = positionsByCurrency[currency];
+                    const stats = statsByCurrency.get(currency);
 
-                    // Calculate subtotal for this currency
-                    const subtotal = positions.reduce((sum, pos) => sum + pos.value, 0);
-                    const subtotalBase = positions.reduce((sum, pos) => sum + pos.value_base, 0);
+                    // Subtotal for this currency
+                    const subtotal = stats.value;
+                    const subtotalBase = stats.value_base;
                     const subtotalPercent = (subtotalBase / currentTotal * 100).toFixed(1);
 
                     // Currency group header
-                    html += `
-                        <div style="background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 15px 20px; border-radius: 8px; margin-top: 20px; margin-bottom: 10px; display: flex; justify-content: space-between; align-items: center;">
-                            <div>
-                                <span style="font-size: 1.3em; font-weight: 700;">${{getCurrencySymbol(currency)}} ${{currency}} Holdings</span>
-                                ${{currency !== baseCurrency ? `<span style="opacity: 0.9; margin-left: 15px; font-size: 0.9em;">@ ${{positions[0].current_fx.toFixed(4)}} ${{baseCurrency}}</span>` : ''}}
-                            </div>
-                            <div style="text-align: right;">
-                                <div style="font-size: 1.4em; font-weight: 700;">${{formatCurrency(subtotal, currency)}}</div>
-                                <div style="font-size: 0.9em; opacity: 0.9;">${{formatCurrency(subtotalBase, baseCurrency)}} · ${{subtotalPercent}}%</div>
-                            </div>
-                        </div>
-                    `;
-
-                    html += '<div class="position-grid">';
-
-                    positions.forEach(pos => {{
-                        const value = currencyMode === 'base' ? pos.value_base : pos.value;
-                        const bookCost = currencyMode === 'base' ? pos.bookCost_base : pos.bookCost;
-                        const dividends = currencyMode === 'base' ? pos.totalDividends_base : pos.totalDividends;
-                        const displayCurrency = currencyMode === 'base' ? baseCurrency : currency;
-                        const unrealizedPL = currencyMode === 'base' ? pos.unrealizedPL_base : pos.unrealizedPL;
-
-                        const isETF = pos.source && pos.source.includes('ETF');
-                        const sourceLabel = isETF ? 'ETF' : 'Stock';
-                        const badgeClass = isETF ? 'badge-etf' : 'badge-stock';
-
-                        const plClass = unrealizedPL >= 0 ? 'pl-positive' : 'pl-negative';
-                        const plSign = unrealizedPL < 0 ? '-' : '';
-
-                        const fxClass = pos.fx_pnl >= 0 ? 'fx-positive' : 'fx-negative';
-                        const fxSign = pos.fx_pnl < 0 ? '-' : '';
-
-                        const hasDividends = dividends > 0;
-                        const dividendText = hasDividends ? ` | Div: ${{formatCurrency(dividends, displayCurrency)}}` : '';
-
-                        const fxInfo = currency !== baseCurrency && currencyMode !== 'base'
-                            ? ` | FX: ${{pos.current_fx.toFixed(4)}} (avg: ${{pos.avg_fx.toFixed(4)}})`
-                            : '';
-
-                        const fxPnlText = Math.abs(pos.fx_pnl) > 0.01 && currencyMode !== 'base'
-                            ? `<div class="fx-pnl ${{fxClass}}">FX P&L: ${{fxSign}}${{formatCurrency(Math.abs(pos.fx_pnl), baseCurrency)}}</div>`
-                            : '';
-
-                        let badges = '';
-                        if (pos.earningsDate) {{
-                            badges += `<span class="earnings-badge" data-date="Next earnings: ${{pos.earningsDate}}">📅</span>`;
-                        }}
-                        if (pos.hasNews && pos.newsLink) {{
-                            badges += `<a href="${{pos.newsLink}}" target="_blank" class="news-icon" title="View latest news">📰</a>`;
-                        }}
-
-                        html += `
-                            <div class="position-item">
-                                <div>
-                                    <span class="position-symbol">${{pos.symbol}}</span>
-                                    <span class="position-badge ${{badgeClass}}">${{sourceLabel}}</span>
-                                    ${{badges}}
-                                </div>
-                                <div class="position-details">
-                                    <div>${{pos.shares.toFixed(2)}} shares @ ${{formatCurrency(pos.price, currency)}}</div>
-                                    <div>Book: ${{formatCurrency(bookCost, displayCurrency)}} | 
-                                        <span class="${{plClass}}">${{plSign}}${{formatCurrency(Math.abs(unrealizedPL), displayCurrency)}} (${{plSign}}${{pos.unrealizedPL_Pct.toFixed(1)}}%)</span>
-                                        ${{dividendText}}${{fxInfo}}
-                                    </div>
-                                    ${{fxPnlText}}
-                                </div>
-                                <div class="position-value">${{formatCurrency(value, displayCurrency)}}</div>
-                                <div class="position-percent" style="color: #718096; font-size: 0.85em;">${{formatCurrency(pos.value_base, baseCurrency)}}</div>
-                            </div>
-                        `;
-                    }});
+                    const groupHeader = makeEl('div', 'background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 15px 20px; border-radius: 8px; margin-top: 20px; margin-bottom: 10px; display: flex; justify-content: space-between; align-items: center;');
+                    const groupTitle = makeEl('div');
+                    groupTitle.appendChild(makeEl('span', 'font-size: 1.3em; font-weight: 700;', `${{getCurrencySymbol(currency)}} ${{currency}} Holdings`));
+                    if (currency !== baseCurrency) {{
+                        groupTitle.append(' ', makeEl('span', 'opacity: 0.9; margin-left: 15px; font-size: 0.9em;',
+                            `@ ${{currentData.positions[stats.indices[0]].fxRateText}} ${{baseCurrency}}`));
+                    }}
+                    const groupTotals = makeEl('div', 'text-align: right;');
+                    groupTotals.append(
+                        makeEl('div', 'font-size: 1.4em; font-weight: 700;', formatCurrency(subtotal, currency)),
+                        makeEl('div', 'font-size: 0.9em; opacity: 0.9;', `${{formatCurrency(subtotalBase, baseCurrency)}} · ${{subtotalPercent}}%`)
+                    );
+                    groupHeader.append(groupTitle, groupTotals);
+                    frag.appendChild(groupHeader);
+
+                    const grid = makeEl('div');
+                    grid.className = 'position-grid';
+
+                    for (const i of stats.indices) {{
+                        const pos = currentData.positions[i];
+                        grid.appendChild(buildPositionNode(pos, {{
+                            value: pos.value,
+                            bookCost: pos.bookCost,
+                            dividends: pos.totalDividends,
+                            plSign: pos.plSignMulti,
+                            fxSign: pos.fxSignMulti,
+                            displayCurrency: currency,
+                            priceCurrency: currency,
+                            fxCurrency: baseCurrency,
+                            fxInfo: currency !== baseCurrency ? pos.fxInfo : '',
+                            currencyBadge: false,
+                            percentText: formatCurrency(pos.value_base, baseCurrency),
+                            percentMuted: true
+                        }}));
+                    }}
 
-                    html += '</div>';
+                    frag.appendChild(grid);
                 }});
 
                 // Grand total in CAD (for reference)
-                html += `
-                    <div style="background: #f7fafc; padding: 15px 20px; border-radius: 8px; margin-top: 20px; display: flex; justify-content: space-between; align-items: center; border: 2px solid #667eea;">
-                        <div style="font-size: 1.1em; font-weight: 600; color: #2d3748;">Total Portfolio (in ${{baseCurrency}})</div>
-                        <div style="font-size: 1.5em; font-weight: 700; color: #667eea;">${{formatCurrency(currentTotal, baseCurrency)}}</div>
-                    </div>
-                `;
+                const grandTotal = makeEl('div', 'background: #f7fafc; padding: 15px 20px; border-radius: 8px; margin-top: 20px; display: flex; justify-content: space-between; align-items: center; border: 2px solid #667eea;');
+                grandTotal.append(
+                    makeEl('div', 'font-size: 1.1em; font-weight: 600; color: #2d3748;', `Total Portfolio (in ${{baseCurrency}})`),
+                    makeEl('div', 'font-size: 1.5em; font-weight: 700; color: #667eea;', formatCurrency(currentTotal, baseCurrency))
+                );
+                frag.appendChild(grandTotal);
             }}
 
-            detailsDiv.innerHTML = html;
+            detailsDiv.replaceChildren(frag);
+        }}
+
+        // Shared by the sector and risk drill-downs: header and rows are cloned from <template>, text goes through textContent
+        const breakdownHeader = document.getElementById('breakdownHeaderTemplate').content.firstElementChild;
+        const breakdownRow = document.getElementById('breakdownRowTemplate').content.firstElementChild;
+
+        function renderBreakdown(label, total, breakdown, etfText) {{
+            const header = breakdownHeader.cloneNode(true);
+            header.querySelector('strong').textContent = `${{label}} - ${{formatCurrency(total)}}`;
+
+            const grid = makeEl('div');
+            grid.className = 'position-grid';
+            breakdown.forEach(item => {{
+                const isETF = item.source === 'ETF';
+                const row = breakdownRow.cloneNode(true);
+                row.querySelector('.position-symbol').textContent = item.symbol;
+                const badge = row.querySelector('.position-badge');
+                badge.classList.add(isETF ? BADGE_ETF : BADGE_STOCK);
+                badge.textContent = isETF ? 'ETF Contribution' : 'Stock';
+                row.querySelector('.position-details > div').textContent = isETF ? etfText : 'Direct holding';
+                row.querySelector('.position-value').textContent = formatCurrency(item.value);
+                row.querySelector('.position-percent').textContent = `${{item.contribution.toFixed(1)}}%`;
+                grid.appendChild(row);
+            }});
+
+            document.getElementById('detailsContent').replaceChildren(header, grid);
         }}
 
         function showSectorBreakdown(sector) {{
             if (!currentData) return;
 
             document.getElementById('detailsTitle').textContent = `🔍 Sector: ${{sector}}`;
+            listedData = null;
 
             const breakdown = currencyMode === 'base' 
                 ? currentData.sector_breakdown_base[sector]
@@ -1262,44 +1457,14 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                 ? currentData.values_base[currentData.sectors_base.indexOf(sector)]
                 : currentData.values_orig[currentData.sectors_orig.indexOf(sector)];
 
-            const detailsDiv = document.getElementById('detailsContent');
-            let html = `
-                <div style="background: #f7fafc; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
-                    <strong>${{sector}} - ${{formatCurrency(sectorValue)}}</strong>
-                    <span style="color: #718096; font-size: 0.9em; margin-left: 15px;">Click "📋 All Positions" to return</span>
-                    <button onclick="showAllPositions()" style="margin-left: 15px; padding: 6px 12px; border-radius: 6px; border: 1px solid #667eea; background: white; color: #667eea; cursor: pointer;">Back to All</button>
-                </div>
-                <div class="position-grid">
-            `;
-
-            breakdown.forEach(item => {{
-                const isETF = item.source === 'ETF';
-                const sourceLabel = isETF ? 'ETF Contribution' : 'Stock';
-                const badgeClass = isETF ? 'badge-etf' : 'badge-stock';
-
-                html += `
-                    <div class="position-item">
-                        <div>
-                            <span class="position-symbol">${{item.symbol}}</span>
-                            <span class="position-badge ${{badgeClass}}">${{sourceLabel}}</span>
-                        </div>
-                        <div class="position-details">
-                            <div>${{isETF ? 'ETF sector allocation' : 'Direct holding'}}</div>
-                        </div>
-                        <div class="position-value">${{formatCurrency(item.value)}}</div>
-                        <div class="position-percent">${{item.contribution.toFixed(1)}}%</div>
-                    </div>
-                `;
-            }});
-
-            html += '</div>';
-            detailsDiv.innerHTML = html;
+            renderBreakdown(sector, sectorValue, breakdown, 'ETF sector allocation');
         }}
 
         function showRiskBreakdown(riskCat) {{
             if (!currentData) return;
 
             document.getElementById('detailsTitle').textContent = `🔍 Risk: ${{riskCat}}`;
+            listedData = null;
 
             const breakdown = currencyMode === 'base'
                 ? currentData.risk_breakdown_base[riskCat]
@@ -1309,70 +1474,74 @@ def generate_interactive_html(csv_path, output_path='portfolio_multicurrency.htm
                 ? currentData.risk_values_base[currentData.risk_categories_base.indexOf(riskCat)]
                 : currentData.risk_values_orig[currentData.risk_categories_orig.indexOf(riskCat)];
 
-            const detailsDiv = document.getElementById('detailsContent');
-            let html = `
-                <div style="background: #f7fafc; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
-                    <strong>${{riskCat}} - ${{formatCurrency(riskValue)}}</strong>
-                    <span style="color: #718096; font-size: 0.9em; margin-left: 15px;">Click "📋 All Positions" to return</span>
-                    <button onclick="showAllPositions()" style="margin-left: 15px; padding: 6px 12px; border-radius: 6px; border: 1px solid #667eea; background: white; color: #667eea; cursor: pointer;">Back to All</button>
-                </div>
-                <div class="position-grid">
-            `;
-
-            breakdown.forEach(item => {{
-                const isETF = item.source === 'ETF';
-                const sourceLabel = isETF ? 'ETF Contribution' : 'Stock';
-                const badgeClass = isETF ? 'badge-etf' : 'badge-stock';
-
-                html += `
-                    <div class="position-item">
-                        <div>
-                            <span class="position-symbol">${{item.symbol}}</span>
-                            <span class="position-badge ${{badgeClass}}">${{sourceLabel}}</span>
-                        </div>
-                        <div class="position-details">
-                            <div>${{isETF ? 'ETF risk allocation' : 'Direct holding'}}</div>
-                        </div>
-                        <div class="position-value">${{formatCurrency(item.value)}}</div>
-                        <div class="position-percent">${{item.contribution.toFixed(1)}}%</div>
-                    </div>
-                `;
-            }});
-
-            html += '</div>';
-            detailsDiv.innerHTML = html;
+            renderBreakdown(riskCat, riskValue, breakdown, 'ETF risk allocation');
         }}
 
         const slider = document.getElementById('dateSlider');
         const dateRange = document.getElementById('dateRange');
 
-        dateRange.textContent = `${{portfolioData[0].date}} - ${{portfolioData[portfolioData.length-1].date}}`;
+        async function loadPortfolioData() {{
+            const bytes = Uint8Array.from(atob(portfolioBlob), c => c.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return JSON.parse(await new Response(stream).text());
+        }}
 
-        slider.addEventListener('input', (e) => {{
-            updateChart(parseInt(e.target.value));
+        // Chart.js is deferred so the page renders without waiting on the CDN; deferred scripts
+        // run after this inline one, so the listener is always attached before it loads
+        const chartJsReady = window.Chart ? Promise.resolve() : new Promise(resolve => {{
+            const tag = document.getElementById('chartJs');
+            tag.addEventListener('load', resolve);
+            tag.addEventListener('error', resolve);
         }});
 
-        // Initialize with latest date
-        updateChart(portfolioData.length - 1);
+        Promise.all([loadPortfolioData(), chartJsReady]).then(([data]) => {{
+            portfolioData = data;
+            dateRange.textContent = `${{portfolioData[0].date}} - ${{portfolioData[portfolioData.length-1].date}}`;
+
+            slider.addEventListener('input', (e) => {{
+                scheduleUpdate(parseInt(e.target.value));
+            }});
+
+            // Initialize with latest date
+            updateChart(portfolioData.length - 1);
+        }});
     </script>
 </body>
 </html>
 """
 
-    # Write to file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # Write to a temp file and swap it in: the bridge hardlinks the chart into
+    # Siyuan assets, so rewriting in place would also change earlier snapshots.
+    # The template and payload are written in pieces rather than as one page string
+    html_head, html_tail = html_template.split(PAYLOAD_SLOT)
+    tmp_path = Path(output_path).with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.write(html_head)
+        f.write(portfolio_blob)
+        f.write(html_tail)
+    os.replace(tmp_path, output_path)
 
     print(f"\n✅ Multi-currency HTML generated: {output_path}")
     print(f"   Base currency: {base_currency}")
     print(f"   Currencies detected: {', '.join(all_currencies)}")
 
 
+def run(output_file=CHART_HTML):
+    """Generate the interactive chart from the unified history (raises RunInProgress while another run writes)"""
+    # load_unified_history may rewrite the parquet sidecar, so take the same lock as the portfolio update
+    with exclusive_run():
+        generate_interactive_html(UNIFIED_HISTORY, output_file)
+    print("\n✨ Visualization ready!")
+    print(f"\n📂 Open in browser: {output_file}")
+    print("📂 Or drag into Siyuan notes for interactive viewing")
+
+
 if __name__ == '__main__':
 
     # output_file = sys.argv[1] if len(sys.argv) > 1 else f'{SIYUAN_FOLDER}//portfolio_sectors_unified.html'
     output_file = sys.argv[1] if len(sys.argv) > 1 else CHART_HTML
-    generate_interactive_html(UNIFIED_HISTORY, output_file)
-    print("\n✨ Visualization ready!")
-    print(f"\n📂 Open in browser: {output_file}")
-    print("📂 Or drag into Siyuan notes for interactive viewing")
\ No newline at end of file
+    try:
+        run(output_file)
+    except RunInProgress as e:
+        print(f"⚠️ {e}")
+        sys.exit(RUN_BUSY_EXIT_CODE)
\ No newline at end of file
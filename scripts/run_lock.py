@@ -0,0 +1,54 @@
+"""
+Cross-process lock around runs that write to OUTPUT_DIR
+Only one portfolio update / chart generation may run at a time, whether it was started by the CLI,
+a bridge child process or any bridge worker. The OS drops the lock when its holder exits, so a
+crashed run never leaves a stale lock behind.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+from configs import RUN_LOCK
+
+
+class RunInProgress(RuntimeError):
+    """Another run currently holds the lock"""
+
+
+def _try_lock(fd):
+    if msvcrt:
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock(fd):
+    if msvcrt:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def exclusive_run(lock_path=RUN_LOCK):
+    """Run the block while holding the lock file; raise RunInProgress at once if another process, thread or bridge worker holds it"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT)
+    try:
+        try:
+            _try_lock(fd)
+        except OSError:
+            raise RunInProgress(f"Another run is in progress ({lock_path})") from None
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
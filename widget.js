@@ -4,11 +4,17 @@
  */
 
 const BRIDGE_URL = "http://127.0.0.1:5000/run-task";
+// 图表嵌入方式: 默认 "copy" 每天在思源 assets 中保存一份快照;
+// 可选 "link" 直接嵌入 bridge 提供的 /chart.html（不复制文件，bridge 停止后图表无法显示）
+const CHART_MODE = "copy";
 const logOutput = document.getElementById('logOutput');
 const workBtn = document.getElementById('workBtn');
 const importNewsBtn = document.getElementById('importNewsBtn');
 const importChartBtn = document.getElementById('importChartBtn');
 
+// 摘要金额由 bridge 以原始数字返回，在此格式化
+const currencyFormat = new Intl.NumberFormat('en-US', { style: 'currency', currency: 'USD' });
+
 // 日志打印函数
 function log(msg, type = 'default') {
     const div = document.createElement('div');
@@ -42,6 +48,9 @@ async function runPortfolioUpdate() {
             })
         });
         
+        if (bridgeRes.status === 409) {
+            throw new Error("已有更新或图表生成正在运行，请稍后再试");
+        }
         if (!bridgeRes.ok) {
             throw new Error(`HTTP错误: ${bridgeRes.status}`);
         }
@@ -57,9 +66,9 @@ async function runPortfolioUpdate() {
         
         if (pyResult.summary) {
             log(`📊 投资组合概览:`, "info");
-            log(`   总价值: ${pyResult.summary.total_value}`, "default");
-            log(`   未实现盈亏: ${pyResult.summary.unrealized_pl}`, "default");
-            log(`   总股息: ${pyResult.summary.total_dividends}`, "default");
+            log(`   总价值: ${currencyFormat.format(pyResult.summary.total_value)}`, "default");
+            log(`   未实现盈亏: ${currencyFormat.format(pyResult.summary.unrealized_pl)}`, "default");
+            log(`   总股息: ${currencyFormat.format(pyResult.summary.total_dividends)}`, "default");
             log(`   持仓数: ${pyResult.summary.position_count}`, "default");
         }
 
@@ -213,6 +222,9 @@ async function importChartToSiyuan() {
             headers: { "Content-Type": "application/json" }
         });
 
+        if (chartRes.status === 409) {
+            throw new Error("已有更新或图表生成正在运行，请稍后再试");
+        }
         if (!chartRes.ok) {
             throw new Error(`HTTP错误: ${chartRes.status}`);
         }
@@ -231,7 +243,8 @@ async function importChartToSiyuan() {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({
-                chart_path: chartData.chart_path
+                chart_path: chartData.chart_path,
+                mode: CHART_MODE
             })
         });
 